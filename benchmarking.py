@@ -171,6 +171,8 @@ best_insert_times = {}
 worst_insert_times = {}
 best_search_times = {}
 worst_search_times = {}
+balanced_insert_times = {}
+balanced_search_times = {}
 
 def median_first_order(words):
     if not words:
@@ -266,6 +268,32 @@ for size in sizes:
         worst_search_times[size] += (end - start)
     worst_search_times[size] /= nr_runs * 1_000_000.0
 
+    # ------------------------------------------
+    # WORST CASE, BALANCED: Sorted insertion into a self-balancing tree
+    # ------------------------------------------
+    balanced_insert_times[size] = 0.0
+    for _ in range(nr_runs):
+        tst = TernarySearchTree(balanced=True)
+        start = time.time_ns()
+        for word in worst_ordered_sample:
+            tst.insert(word)
+        end = time.time_ns()
+        balanced_insert_times[size] += (end - start)
+    balanced_insert_times[size] /= nr_runs * 1_000_000.0
+
+    balanced_search_times[size] = 0.0
+    for _ in range(nr_runs):
+        tst = TernarySearchTree(balanced=True)
+        for word in worst_ordered_sample:
+            tst.insert(word)
+        search_words = random.sample(worst_ordered_sample, k=20)
+        start = time.time_ns()
+        for word in search_words:
+            tst.search(word)
+        end = time.time_ns()
+        balanced_search_times[size] += (end - start)
+    balanced_search_times[size] /= nr_runs * 1_000_000.0
+
 # -------------------------------
 # PLOT: INSERTION TIME COMPARISON
 # -------------------------------
@@ -273,6 +301,7 @@ plt.figure()
 plt.plot(sizes, [insert_times[s] for s in sizes], label='Average Case', marker='o')
 plt.plot(sizes, [best_insert_times[s] for s in sizes], label='Best Case', marker='^')
 plt.plot(sizes, [worst_insert_times[s] for s in sizes], label='Worst Case', marker='s')
+plt.plot(sizes, [balanced_insert_times[s] for s in sizes], label='Worst Case (balanced=True)', marker='x')
 plt.title("TST Insert Time: Best vs Average vs Worst")
 plt.xlabel("Number of words")
 plt.ylabel("Insert Time (ms)")
@@ -287,6 +316,7 @@ plt.figure()
 plt.plot(sizes, [search_times[s] for s in sizes], label='Average Case', marker='o')
 plt.plot(sizes, [best_search_times[s] for s in sizes], label='Best Case', marker='^')
 plt.plot(sizes, [worst_search_times[s] for s in sizes], label='Worst Case', marker='s')
+plt.plot(sizes, [balanced_search_times[s] for s in sizes], label='Worst Case (balanced=True)', marker='x')
 plt.title("TST Search Time: Best vs Average vs Worst")
 plt.xlabel("Number of words")
 plt.ylabel("Search Time (ms)")
@@ -311,6 +341,8 @@ Worst Case:
 - Words are inserted in sorted or reverse sorted order.
 - Tree becomes unbalanced and resembles a linked list.
 - Insert/Search degrades to O(L * n).
+- With TernarySearchTree(balanced=True) the sibling chains are kept height-balanced (AVL rotations),
+  so sorted insertion stays at O(L + log n) and behaves like the best case.
 
 In this benchmark:
 - We use random word samples to approximate average-case performance.
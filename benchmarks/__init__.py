@@ -0,0 +1,6 @@
+"""Benchmarks for the Ternary Search Tree implementations.
+
+Every module is a script, run from the repository root with
+``python -m benchmarks.<name>``; ``benchmarks.suite`` runs the named
+scenarios used to check changes for performance regressions.
+"""
@@ -0,0 +1,92 @@
+"""
+bulk_load.py
+
+This script compares building a TST word by word with insert() against the balanced bulk loader TernarySearchTree.from_iterable(), for sorted (file order), shuffled and median-first input.
+It also shows the effect of rebalance() and of the self-balancing insert mode on the sorted input.
+Run from the repository root with: python -m benchmarks.bulk_load
+"""
+import random
+import time
+from ternary_search_tree import TernarySearchTree
+
+random.seed(42)
+
+# -------------------------------
+# LOAD DATASET
+# -------------------------------
+with open('data/search_trees/corncob_lowercase.txt') as file:
+    words = [line.strip() for line in file]
+
+
+def median_first_order(words):
+    # iterative version of the ordering used in benchmarking.py
+    ordered, ranges = [], [(0, len(words))]
+    while ranges:
+        lo, hi = ranges.pop(0)
+        if lo < hi:
+            mid = (lo + hi) // 2
+            ordered.append(words[mid])
+            ranges += [(lo, mid), (mid + 1, hi)]
+    return ordered
+
+
+def mean_search_depth(tree, words):
+    # average number of nodes visited to find each word
+    visits = 0
+    for word in words:
+        node, i = tree._root, 0
+        while True:
+            visits += 1
+            if word[i] < node._char:
+                node = node._lt
+            elif word[i] > node._char:
+                node = node._gt
+            elif i == len(word) - 1:
+                break
+            else:
+                node, i = node._eq, i + 1
+    return visits / len(words)
+
+
+shuffled = random.sample(words, k=len(words))
+orders = {
+    'sorted (file order)': words,
+    'shuffled': shuffled,
+    'median-first': median_first_order(sorted(words)),
+}
+
+# -------------------------------
+# BUILD BENCHMARK
+# -------------------------------
+print(f"{'input order':<22}{'method':<16}{'build (ms)':>12}{'mean depth':>12}")
+for name, order in orders.items():
+    start = time.perf_counter_ns()
+    tst = TernarySearchTree()
+    for word in order:
+        tst.insert(word)
+    insert_time = (time.perf_counter_ns() - start) / 1_000_000.0
+
+    start = time.perf_counter_ns()
+    bulk = TernarySearchTree.from_iterable(order)
+    bulk_time = (time.perf_counter_ns() - start) / 1_000_000.0
+
+    print(f"{name:<22}{'insert()':<16}{insert_time:>12.1f}{mean_search_depth(tst, words):>12.1f}")
+    print(f"{name:<22}{'from_iterable()':<16}{bulk_time:>12.1f}{mean_search_depth(bulk, words):>12.1f}")
+
+# -------------------------------
+# REBALANCING BENCHMARK
+# -------------------------------
+start = time.perf_counter_ns()
+tst = TernarySearchTree(balanced=True)
+for word in words:
+    tst.insert(word)
+balanced_time = (time.perf_counter_ns() - start) / 1_000_000.0
+print(f"{'sorted (file order)':<22}{'balanced=True':<16}{balanced_time:>12.1f}{mean_search_depth(tst, words):>12.1f}")
+
+tst = TernarySearchTree()
+for word in words:
+    tst.insert(word)
+start = time.perf_counter_ns()
+tst.rebalance()
+rebalance_time = (time.perf_counter_ns() - start) / 1_000_000.0
+print(f"{'sorted (file order)':<22}{'rebalance()':<16}{rebalance_time:>12.1f}{mean_search_depth(tst, words):>12.1f}")
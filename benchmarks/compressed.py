@@ -0,0 +1,80 @@
+"""
+compressed.py
+
+This script compares the path-compressed CompressedTernarySearchTree with TernarySearchTree on the bundled word lists.
+It reports node counts, node bytes, mean nodes visited per exact lookup, and lookup and prefix latencies.
+Both trees are built in the same median-first order.
+Run from the repository root with: python -m benchmarks.compressed
+"""
+import random
+import time
+from ternary_search_tree import TernarySearchTree
+from compressed_tree import CompressedTernarySearchTree
+
+random.seed(42)
+nr_runs = 5
+
+
+def compressed_visits(tree, word):
+    """ number of nodes an exact search for word visits """
+    node, i, visits = tree._root, 0, 0
+    while node is not None:
+        visits += 1
+        if word[i] < node._chars[0]:
+            node = node._lt
+        elif word[i] > node._chars[0]:
+            node = node._gt
+        else:
+            i += len(node._chars)
+            if i >= len(word):
+                break
+            node = node._eq
+    return visits
+
+
+def best_time(function, keys):
+    times = []
+    for _ in range(nr_runs):
+        start = time.perf_counter_ns()
+        function(keys)
+        times.append(time.perf_counter_ns() - start)
+    return min(times) / len(keys)
+
+
+# -------------------------------
+# COMPARISON PER DATA FILE
+# -------------------------------
+for path in ('data/search_trees/insert_words.txt', 'data/search_trees/corncob_lowercase.txt'):
+    with open(path) as file:
+        words = sorted({line.strip() for line in file} - {''})
+    tst = TernarySearchTree.from_iterable(words)
+    compressed = CompressedTernarySearchTree.from_iterable(words)
+    assert sorted(compressed.all_strings()) == sorted(tst.all_strings())
+
+    hits = random.choices(words, k=10_000)
+    misses = [word + 'q' for word in hits]
+    prefixes = [word[:3] for word in hits[:1_000]]
+    tst.instrument()
+    for word in hits:
+        tst.search(word, exact=True)
+    tst_visits = tst.op_counts()['search'].visits / len(hits)
+    tst.instrument(False)
+    stats = tst.stats()
+
+    print(f"\n{path} ({len(words):,} words)")
+    print(f"{'':<28}{'TernarySearchTree':>20}{'Compressed':>14}")
+    rows = [
+        ('nodes', stats.nodes, compressed.node_count(), ',.0f'),
+        ('node bytes (MB)', stats.nbytes / 1e6, compressed.nbytes / 1e6, '.2f'),
+        ('nodes visited per lookup', tst_visits,
+         sum(compressed_visits(compressed, word) for word in hits) / len(hits), '.1f'),
+    ]
+    for label, keys, exact in (('exact hit (µs)', hits, True), ('exact miss (µs)', misses, True),
+                               ('prefix test (µs)', prefixes, False)):
+        rows.append((label, *(best_time(lambda ks: [tree.search(k, exact) for k in ks], keys) / 1e3
+                              for tree in (tst, compressed)), '.2f'))
+    rows.append(('10 completions (µs)',
+                 *(best_time(lambda ks: [list(tree.iter_prefix(k, 10)) for k in ks], prefixes) / 1e3
+                   for tree in (tst, compressed)), '.2f'))
+    for label, plain, compact, spec in rows:
+        print(f"{label:<28}{plain:>20{spec}}{compact:>14{spec}}")
@@ -0,0 +1,50 @@
+"""
+freeze.py
+
+This script measures how much TernarySearchTree.freeze() shrinks the corncob dictionary by sharing equal subtrees.
+It reports node counts, bytes and lookup latency for the TernarySearchTree, its CompactTernarySearchTree copy and the frozen DAWG.
+Run from the repository root with: python -m benchmarks.freeze
+"""
+import random
+import time
+from ternary_search_tree import TernarySearchTree
+from compact_tree import CompactTernarySearchTree
+
+random.seed(42)
+nr_runs = 5
+
+# -------------------------------
+# LOAD DATASET
+# -------------------------------
+with open('data/search_trees/corncob_lowercase.txt') as file:
+    words = [line.strip() for line in file]
+
+tst = TernarySearchTree.from_iterable(words)
+start = time.perf_counter_ns()
+frozen = tst.freeze()
+freeze_seconds = (time.perf_counter_ns() - start) / 1e9
+compact = CompactTernarySearchTree.from_tree(tst)
+
+
+def best_time(tree, keys):
+    times = []
+    for _ in range(nr_runs):
+        start = time.perf_counter_ns()
+        for key in keys:
+            tree.search(key, exact=True)
+        times.append(time.perf_counter_ns() - start)
+    return min(times) / len(keys) / 1e3
+
+
+# -------------------------------
+# NODES, BYTES AND LATENCY
+# -------------------------------
+keys = random.choices(words, k=10_000)
+stats = tst.stats()
+print(f"freeze() took {freeze_seconds:.2f} s\n")
+print(f"{'tree':<30}{'nodes':>10}{'bytes':>14}{'lookup (µs)':>14}")
+for name, nodes, nbytes, tree in (
+        ('TernarySearchTree', stats.nodes, stats.nbytes, tst),
+        ('CompactTernarySearchTree', len(compact._store), compact.nbytes, compact),
+        ('FrozenTernarySearchTree', len(frozen._store), frozen.nbytes, frozen)):
+    print(f"{name:<30}{nodes:>10,}{nbytes:>14,}{best_time(tree, keys):>14.2f}")
@@ -0,0 +1,57 @@
+"""
+fuzzy.py
+
+This script compares TernarySearchTree.fuzzy_search() with a brute-force Levenshtein scan over all_strings() on the corncob dictionary, for edit distances 1 and 2.
+Run from the repository root with: python -m benchmarks.fuzzy
+"""
+import random
+import time
+from ternary_search_tree import TernarySearchTree
+
+random.seed(42)
+
+# -------------------------------
+# LOAD DATASET
+# -------------------------------
+with open('data/search_trees/corncob_lowercase.txt') as file:
+    words = [line.strip() for line in file]
+tst = TernarySearchTree.from_iterable(words)
+
+
+def levenshtein(a, b):
+    above = list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        row = [i]
+        for j in range(1, len(b) + 1):
+            row.append(min(row[j - 1] + 1, above[j] + 1, above[j - 1] + (b[j - 1] != char)))
+        above = row
+    return above[-1]
+
+
+def brute_force(word, max_distance):
+    matches = [(other, levenshtein(word, other)) for other in tst.all_strings()]
+    return sorted((match for match in matches if match[1] <= max_distance),
+                  key=lambda match: (match[1], match[0]))
+
+
+# misspelled queries: one random substitution in a dictionary word
+queries = []
+for word in random.sample(words, k=10):
+    i = random.randrange(len(word))
+    queries.append(word[:i] + random.choice('abcdefghijklmnopqrstuvwxyz') + word[i + 1:])
+
+# -------------------------------
+# FUZZY SEARCH BENCHMARK
+# -------------------------------
+print(f"{'distance':>8}{'fuzzy_search (ms/query)':>26}{'brute force (ms/query)':>26}")
+for max_distance in (1, 2):
+    start = time.perf_counter_ns()
+    results = [tst.fuzzy_search(query, max_distance) for query in queries]
+    tree_time = (time.perf_counter_ns() - start) / 1e6 / len(queries)
+
+    start = time.perf_counter_ns()
+    expected = [brute_force(query, max_distance) for query in queries]
+    brute_time = (time.perf_counter_ns() - start) / 1e6 / len(queries)
+
+    assert results == expected
+    print(f"{max_distance:>8}{tree_time:>26.2f}{brute_time:>26.2f}")
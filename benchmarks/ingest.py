@@ -0,0 +1,47 @@
+"""
+ingest.py
+
+This script compares building a TernarySearchTree from a word list read into a Python list ([line.strip() for line in file]) with streaming the file through insert_from_file().
+It reports the time and tracemalloc peak memory of each approach, on the corncob dictionary.
+Run from the repository root with: python -m benchmarks.ingest
+"""
+import time
+import tracemalloc
+from ternary_search_tree import TernarySearchTree
+
+path = 'data/search_trees/corncob_lowercase.txt'
+
+
+def from_list():
+    tst = TernarySearchTree()
+    with open(path) as file:
+        words = [line.strip() for line in file]
+    for word in words:
+        tst.insert(word)
+    return tst
+
+
+def from_file():
+    tst = TernarySearchTree()
+    tst.insert_from_file(path)
+    return tst
+
+
+# -------------------------------
+# TIME AND PEAK MEMORY
+# -------------------------------
+print(f"{'approach':<20}{'seconds':>10}{'peak (MB)':>12}{'tree (MB)':>12}")
+for name, build in (('list of lines', from_list), ('insert_from_file', from_file)):
+    start = time.perf_counter_ns()
+    build()
+    seconds = (time.perf_counter_ns() - start) / 1e9
+
+    tracemalloc.start()
+    tst = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<20}{seconds:>10.2f}{peak / 1e6:>12.2f}{current / 1e6:>12.2f}")
+
+report = TernarySearchTree().insert_from_file(path)
+print(f"\ninsert_from_file: {report.lines:,} lines, {report.keys:,} keys, "
+      f"{report.keys_per_second:,.0f} keys/s")
@@ -0,0 +1,60 @@
+"""
+load.py
+
+This script compares the startup cost of rebuilding a TST from the corncob word list with loading a binary image written by TernarySearchTree.save(), with and without mmap.
+Run from the repository root with: python -m benchmarks.load
+"""
+import os
+import random
+import tempfile
+import time
+from ternary_search_tree import TernarySearchTree
+
+random.seed(42)
+nr_runs = 5
+
+# -------------------------------
+# LOAD DATASET
+# -------------------------------
+with open('data/search_trees/corncob_lowercase.txt') as file:
+    words = [line.strip() for line in file]
+search_sample = random.sample(words, k=1_000)
+
+path = os.path.join(tempfile.mkdtemp(), 'corncob.tst')
+TernarySearchTree.from_iterable(words).save(path)
+
+
+def rebuild_insert():
+    tst = TernarySearchTree()
+    with open('data/search_trees/corncob_lowercase.txt') as file:
+        for line in file:
+            tst.insert(line.strip())
+    return tst
+
+
+def rebuild_bulk():
+    with open('data/search_trees/corncob_lowercase.txt') as file:
+        return TernarySearchTree.from_iterable(line.strip() for line in file)
+
+
+# -------------------------------
+# STARTUP BENCHMARK
+# -------------------------------
+print(f"image size: {os.path.getsize(path) / 2**20:.2f} MiB")
+print(f"{'startup':<28}{'load (ms)':>12}{'1000 searches (ms)':>20}")
+for name, startup in (('insert() from text file', rebuild_insert),
+                      ('from_iterable() from text', rebuild_bulk),
+                      ('load(mmap=False)', lambda: TernarySearchTree.load(path, mmap=False)),
+                      ('load(mmap=True)', lambda: TernarySearchTree.load(path, mmap=True))):
+    load_times, search_times = [], []
+    for _ in range(nr_runs):
+        start = time.perf_counter_ns()
+        tst = startup()
+        load_times.append(time.perf_counter_ns() - start)
+        start = time.perf_counter_ns()
+        for word in search_sample:
+            tst.search(word, exact=True)
+        search_times.append(time.perf_counter_ns() - start)
+    print(f"{name:<28}{min(load_times) / 1e6:>12.2f}{min(search_times) / 1e6:>20.2f}")
+
+os.remove(path)
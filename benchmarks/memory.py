@@ -0,0 +1,47 @@
+"""
+memory.py
+
+This script compares the memory footprint of the object-per-node TernarySearchTree with the array-backed CompactTernarySearchTree on the corncob dictionary.
+Run from the repository root with: python -m benchmarks.memory
+"""
+import sys
+from ternary_search_tree import TernarySearchTree
+from compact_tree import CompactTernarySearchTree
+
+# -------------------------------
+# LOAD DATASET
+# -------------------------------
+with open('data/search_trees/corncob_lowercase.txt') as file:
+    words = [line.strip() for line in file]
+
+
+def tree_nbytes(tree):
+    """ size of all TtreeNode objects and their attribute dicts in bytes,
+    together with the number of nodes """
+    nbytes, nodes = 0, 0
+    stack = [tree._root] if tree._root is not None else []
+    while stack:
+        node = stack.pop()
+        nodes += 1
+        nbytes += sys.getsizeof(node) + sys.getsizeof(node.__dict__)
+        stack.extend(child for child in (node._lt, node._eq, node._gt) if child is not None)
+    return nbytes, nodes
+
+
+# -------------------------------
+# MEMORY COMPARISON
+# -------------------------------
+tst = TernarySearchTree()
+for word in words:
+    tst.insert(word)
+compact = CompactTernarySearchTree.from_tree(tst)
+
+tst_bytes, nodes = tree_nbytes(tst)
+compact_bytes = compact.nbytes
+keys = len(set(words))
+
+print(f"{keys} keys, {nodes} nodes")
+print(f"{'implementation':<28}{'bytes/node':>12}{'bytes/key':>12}{'total MiB':>12}")
+for name, nbytes in (('TernarySearchTree', tst_bytes),
+                     ('CompactTernarySearchTree', compact_bytes)):
+    print(f"{name:<28}{nbytes / nodes:>12.1f}{nbytes / keys:>12.1f}{nbytes / 2**20:>12.2f}")
@@ -0,0 +1,65 @@
+"""
+search_many.py
+
+This script compares the throughput of batched exact lookups with TernarySearchTree.contains_many() against a Python loop over search() and against a Python set, for several batch sizes.
+Batches are drawn either uniformly (all keys distinct) or from a Zipf-like token distribution with repeats, as in request traffic.
+Run from the repository root with: python -m benchmarks.search_many
+"""
+import random
+import time
+from ternary_search_tree import TernarySearchTree
+
+random.seed(42)
+nr_runs = 20
+
+# -------------------------------
+# LOAD DATASET
+# -------------------------------
+with open('data/search_trees/corncob_lowercase.txt') as file:
+    words = [line.strip() for line in file]
+
+# hold out a part of the words so that half of the lookups miss
+random.shuffle(words)
+stored, held_out = words[:40_000], words[40_000:]
+tst = TernarySearchTree.from_iterable(stored)
+word_set = set(stored)
+
+
+def best_time(function, batch):
+    times = []
+    for _ in range(nr_runs):
+        start = time.perf_counter_ns()
+        function(batch)
+        times.append(time.perf_counter_ns() - start)
+    return min(times) / 1e9
+
+
+def uniform_batch(size):
+    batch = random.sample(stored, k=size // 2) + random.sample(held_out, k=size // 2)
+    random.shuffle(batch)
+    return batch
+
+
+vocabulary = random.sample(stored, k=5_000) + random.sample(held_out, k=5_000)
+random.shuffle(vocabulary)
+zipf_weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+
+
+def zipf_batch(size):
+    return random.choices(vocabulary, weights=zipf_weights, k=size)
+
+
+# -------------------------------
+# THROUGHPUT BENCHMARK
+# -------------------------------
+print(f"{'keys':<9}{'batch':>8}{'search() loop':>18}{'contains_many()':>18}{'set':>18}   (keys/s)")
+for name, make_batch in (('uniform', uniform_batch), ('zipf', zipf_batch)):
+    for batch_size in (100, 1_000, 10_000):
+        batch = make_batch(batch_size)
+        assert tst.contains_many(batch) == [tst.search(word, exact=True) for word in batch]
+
+        loop = best_time(lambda keys: [tst.search(word, exact=True) for word in keys], batch)
+        batched = best_time(tst.contains_many, batch)
+        hashed = best_time(lambda keys: [word in word_set for word in keys], batch)
+        print(f"{name:<9}{batch_size:>8}{batch_size / loop:>18,.0f}"
+              f"{batch_size / batched:>18,.0f}{batch_size / hashed:>18,.0f}")
@@ -0,0 +1,90 @@
+"""
+server.py
+
+This script load-tests tree_server.TreeServer over HTTP on localhost.
+Concurrent keep-alive clients send Zipf-distributed exact, prefix and top-k queries for a fixed time.
+The script reports throughput (QPS) and latency percentiles.
+It compares the default server, which coalesces and micro-batches queries, with one that answers every query on its own (batch_size=1).
+Run from the repository root with: python -m benchmarks.server
+"""
+import asyncio
+import multiprocessing
+import random
+import statistics
+import time
+from ternary_search_tree import TernarySearchTree
+from tree_server import TreeServer
+
+random.seed(42)
+duration = 3.0  # seconds per run
+
+# -------------------------------
+# LOAD DATASET
+# -------------------------------
+with open('data/search_trees/corncob_lowercase.txt') as file:
+    words = [line.strip() for line in file]
+
+vocabulary = random.sample(words, k=5_000)
+zipf_weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+targets = []
+for word in random.choices(vocabulary, weights=zipf_weights, k=20_000):
+    kind = random.random()
+    if kind < 0.6:
+        targets.append(f'/search?q={word}&exact=1')
+    elif kind < 0.9:
+        targets.append(f'/complete?prefix={word[:3]}&limit=10')
+    else:
+        targets.append(f'/top_k?prefix={word[:2]}&k=5')
+
+
+def serve(port, batch_size, ready):
+    async def main():
+        server = TreeServer(TernarySearchTree.from_iterable(words), batch_size=batch_size)
+        await server.start(port=port)
+        ready.set()
+        await server.serve_forever()
+    asyncio.run(main())
+
+
+async def client(port, latencies, deadline, offset):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    i = offset
+    while time.perf_counter() < deadline:
+        start = time.perf_counter_ns()
+        writer.write(f'GET {targets[i % len(targets)]} HTTP/1.1\r\n\r\n'.encode())
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line == b'\r\n':
+                break
+            if line.lower().startswith(b'content-length'):
+                length = int(line.split(b':')[1])
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter_ns() - start)
+        i += 1
+    writer.close()
+
+
+async def load(port, clients):
+    latencies = []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(client(port, latencies, deadline, 997 * c) for c in range(clients)))
+    return latencies
+
+
+# -------------------------------
+# LOAD TEST
+# -------------------------------
+print(f"{'server':<12}{'clients':>8}{'QPS':>10}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}")
+for name, batch_size, port in (('batched', 256, 8571), ('unbatched', 1, 8572)):
+    ready = multiprocessing.Event()
+    process = multiprocessing.Process(target=serve, args=(port, batch_size, ready), daemon=True)
+    process.start()
+    ready.wait()
+    for clients in (1, 16, 64):
+        latencies = asyncio.run(load(port, clients))
+        p = statistics.quantiles(latencies, n=100)
+        print(f"{name:<12}{clients:>8}{len(latencies) / duration:>10,.0f}"
+              f"{p[49] / 1e6:>10.2f}{p[94] / 1e6:>10.2f}{p[98] / 1e6:>10.2f}")
+    process.terminate()
+    process.join()
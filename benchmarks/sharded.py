@@ -0,0 +1,58 @@
+"""
+sharded.py
+
+This script measures how ShardedTernarySearchTree scales with the number of worker processes: build time, and the throughput of batched exact lookups (contains_many), compared with a single in-process TernarySearchTree.
+Speedups depend on the number of available cores; with a single core the shards only add inter-process overhead.
+Run from the repository root with: python -m benchmarks.sharded
+"""
+import os
+import random
+import time
+from ternary_search_tree import TernarySearchTree
+from sharded_tree import ShardedTernarySearchTree
+
+random.seed(42)
+nr_runs = 5
+batch_size = 20_000
+
+# -------------------------------
+# LOAD DATASET
+# -------------------------------
+with open('data/search_trees/corncob_lowercase.txt') as file:
+    words = [line.strip() for line in file]
+
+random.shuffle(words)
+stored, held_out = words[:40_000], words[40_000:]
+batch = random.choices(stored, k=batch_size // 2) + random.choices(held_out, k=batch_size // 2)
+random.shuffle(batch)
+
+
+def best_time(function, *args):
+    times = []
+    for _ in range(nr_runs):
+        start = time.perf_counter_ns()
+        function(*args)
+        times.append(time.perf_counter_ns() - start)
+    return min(times) / 1e9
+
+
+# -------------------------------
+# SCALING BENCHMARK
+# -------------------------------
+print(f"cores available: {os.cpu_count()}")
+print(f"{'workers':<10}{'build (s)':>12}{'contains_many (keys/s)':>26}{'speedup':>10}")
+
+tst = TernarySearchTree.from_iterable(stored)
+build = best_time(TernarySearchTree.from_iterable, stored)
+single = best_time(tst.contains_many, batch)
+print(f"{'in-process':<10}{build:>12.3f}{batch_size / single:>26,.0f}{1:>10.2f}")
+
+expected = tst.contains_many(batch)
+for workers in (1, 2, 4, 8):
+    start = time.perf_counter_ns()
+    sharded = ShardedTernarySearchTree(stored, workers=workers)
+    build = (time.perf_counter_ns() - start) / 1e9
+    with sharded:
+        assert sharded.contains_many(batch) == expected
+        batched = best_time(sharded.contains_many, batch)
+    print(f"{workers:<10}{build:>12.3f}{batch_size / batched:>26,.0f}{single / batched:>10.2f}")
@@ -0,0 +1,94 @@
+"""
+snapshot.py
+
+This script measures read throughput while a writer thread keeps inserting words, for a TernarySearchTree guarded by one lock and for a persistent (copy-on-write) tree whose readers search lock-free snapshots.
+It also reports the cost of path copying for a single-threaded insert.
+Threads share the interpreter lock, so lock-free readers do not run in parallel here; the gain is that readers never wait for a writer to finish an insert.
+Run from the repository root with: python -m benchmarks.snapshot
+"""
+import random
+import threading
+import time
+from ternary_search_tree import TernarySearchTree
+
+random.seed(42)
+duration = 2.0  # seconds per run
+
+# -------------------------------
+# LOAD DATASET
+# -------------------------------
+with open('data/search_trees/corncob_lowercase.txt') as file:
+    words = [line.strip() for line in file]
+
+random.shuffle(words)
+initial, streamed = words[:30_000], words[30_000:]
+queries = random.choices(words, k=1_000)
+
+
+# -------------------------------
+# INSERT COST
+# -------------------------------
+print(f"{'mode':<14}{'insert (µs/word)':>18}")
+for persistent in (False, True):
+    tst = TernarySearchTree.from_iterable(initial, persistent=persistent)
+    start = time.perf_counter_ns()
+    for word in streamed:
+        tst.insert(word)
+    elapsed = time.perf_counter_ns() - start
+    print(f"{'persistent' if persistent else 'in place':<14}{elapsed / len(streamed) / 1e3:>18.2f}")
+
+
+# -------------------------------
+# READS DURING WRITES
+# -------------------------------
+def run(readers, persistent):
+    tst = TernarySearchTree.from_iterable(initial, persistent=persistent)
+    lock = threading.Lock()
+    stop = threading.Event()
+    reads = [0] * readers
+
+    def write():
+        while not stop.is_set():
+            for word in streamed:
+                if stop.is_set():
+                    break
+                if persistent:
+                    tst.insert(word)
+                else:
+                    with lock:
+                        tst.insert(word)
+            for word in streamed:
+                if stop.is_set():
+                    break
+                if persistent:
+                    tst.discard(word)
+                else:
+                    with lock:
+                        tst.discard(word)
+
+    def read(reader):
+        while not stop.is_set():
+            if persistent:
+                view = tst.snapshot()
+                for word in queries:
+                    view.search(word, exact=True)
+            else:
+                for word in queries:
+                    with lock:
+                        tst.search(word, exact=True)
+            reads[reader] += len(queries)
+
+    threads = [threading.Thread(target=write)]
+    threads += [threading.Thread(target=read, args=(reader,)) for reader in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(reads) / duration
+
+
+print(f"\n{'readers':<10}{'locked (reads/s)':>20}{'snapshots (reads/s)':>22}")
+for readers in (1, 2, 4, 8):
+    print(f"{readers:<10}{run(readers, False):>20,.0f}{run(readers, True):>22,.0f}")
@@ -0,0 +1,233 @@
+"""
+suite.py
+
+This script runs the named benchmark scenarios of TernarySearchTree and writes the results as JSON, so that two runs (e.g. before and after a change to ternary_search_tree.py) can be compared.
+Every scenario is prepared outside the timed region, warmed up, then timed over repeated runs with time.perf_counter_ns; the median and interquartile range of the runs are reported together with the tracemalloc peak of one extra run and the memory still held by its result.
+Run from the repository root with:
+    python -m benchmarks.suite run --output before.json
+    python -m benchmarks.suite run --output after.json
+    python -m benchmarks.suite compare before.json after.json --threshold 0.1
+compare exits with status 1 if a scenario got slower (or its peak memory grew) by more than the threshold; a slowdown also has to exceed the larger IQR of the two runs, so that noise is not reported.
+"""
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from ternary_search_tree import TernarySearchTree
+
+SEED = 42
+SCENARIOS = {}
+
+
+def scenario(name):
+    """ register a scenario: a function taking the word list and a seeded
+    random.Random, which prepares its input and returns (operations, run),
+    where run is the callable to time """
+    def register(prepare):
+        SCENARIOS[name] = prepare
+        return prepare
+    return register
+
+
+# -------------------------------
+# SCENARIOS
+# -------------------------------
+@scenario('build')
+def build(words, rng):
+    shuffled = rng.sample(words, k=len(words))
+
+    def run():
+        tst = TernarySearchTree()
+        for word in shuffled:
+            tst.insert(word)
+        return tst
+    return len(shuffled), run
+
+
+@scenario('build_bulk')
+def build_bulk(words, rng):
+    shuffled = rng.sample(words, k=len(words))
+    return len(shuffled), lambda: TernarySearchTree.from_iterable(shuffled)
+
+
+def _split(words, rng):
+    """ a tree holding half of the words and the other, held-out half """
+    shuffled = rng.sample(words, k=len(words))
+    half = len(shuffled) // 2
+    tst = TernarySearchTree()
+    for word in shuffled[:half]:
+        tst.insert(word)
+    return tst, shuffled[:half], shuffled[half:]
+
+
+@scenario('search_hit')
+def search_hit(words, rng):
+    tst, stored, _ = _split(words, rng)
+    keys = rng.choices(stored, k=10_000)
+    return len(keys), lambda: [tst.search(key, exact=True) for key in keys]
+
+
+@scenario('search_miss')
+def search_miss(words, rng):
+    tst, _, held_out = _split(words, rng)
+    keys = rng.choices(held_out, k=10_000)
+    return len(keys), lambda: [tst.search(key, exact=True) for key in keys]
+
+
+@scenario('prefix')
+def prefix(words, rng):
+    tst, stored, _ = _split(words, rng)
+    prefixes = [word[:3] for word in rng.choices(stored, k=1_000)]
+    return len(prefixes), lambda: [list(tst.iter_prefix(prefix, 10)) for prefix in prefixes]
+
+
+@scenario('all_strings')
+def all_strings(words, rng):
+    tst, _, _ = _split(words, rng)
+    return 1, tst.all_strings
+
+
+@scenario('memory')
+def memory(words, rng):
+    # retained_bytes of this scenario is the size of the built tree
+    shuffled = rng.sample(words, k=len(words))
+    return 1, lambda: TernarySearchTree.from_iterable(shuffled)
+
+
+# -------------------------------
+# RUNNER
+# -------------------------------
+def measure(name, words, runs, warmup):
+    """ time one scenario
+    Parameters
+    ----------
+    name   : str, key of SCENARIOS
+    words  : list of str
+    runs   : int, number of timed runs
+    warmup : int, number of untimed runs before them
+
+    Returns
+    ----------
+    dict of results
+    """
+    operations, run = SCENARIOS[name](words, random.Random(SEED))
+    for _ in range(warmup):
+        run()
+
+    times = []
+    for _ in range(runs):
+        # collect garbage of earlier runs outside the timed region
+        gc.collect()
+        start = time.perf_counter_ns()
+        run()
+        times.append(time.perf_counter_ns() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    result = run()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    quartiles = statistics.quantiles(times, n=4) if runs > 1 else [times[0]] * 3
+    return {
+        'operations': operations,
+        'runs': runs,
+        'median_ns': statistics.median(times),
+        'iqr_ns': quartiles[2] - quartiles[0],
+        'min_ns': min(times),
+        'ns_per_operation': statistics.median(times) / operations,
+        'peak_bytes': peak,
+        'retained_bytes': retained,
+    }
+
+
+def run_suite(args):
+    with open(args.words) as file:
+        words = [line.strip() for line in file]
+    names = args.scenarios or list(SCENARIOS)
+    report = {
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'seed': SEED,
+        'words': len(words),
+        'scenarios': {},
+    }
+    print(f"{'scenario':<14}{'median (ms)':>13}{'IQR (ms)':>11}{'ns/op':>15}"
+          f"{'peak (MB)':>11}{'kept (MB)':>11}")
+    for name in names:
+        result = measure(name, words, args.runs, args.warmup)
+        report['scenarios'][name] = result
+        print(f"{name:<14}{result['median_ns'] / 1e6:>13.2f}{result['iqr_ns'] / 1e6:>11.2f}"
+              f"{result['ns_per_operation']:>15,.0f}{result['peak_bytes'] / 1e6:>11.2f}"
+              f"{result['retained_bytes'] / 1e6:>11.2f}")
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+
+def compare(before, after, threshold):
+    """ compare two reports written by run_suite
+    Parameters
+    ----------
+    before    : dict
+    after     : dict
+    threshold : float, relative change counted as a regression
+
+    Returns
+    ----------
+    list of (scenario, metric, relative change) regressions
+    """
+    regressions = []
+    print(f"{'scenario':<14}{'time':>10}{'memory':>10}")
+    for name, new in after['scenarios'].items():
+        old = before['scenarios'].get(name)
+        if old is None:
+            continue
+        changes, flag = [], ''
+        for metric in ('median_ns', 'peak_bytes'):
+            change = new[metric] / old[metric] - 1 if old[metric] else 0.0
+            changes.append(change)
+            noise = max(old['iqr_ns'], new['iqr_ns']) if metric == 'median_ns' else 0
+            if change > threshold and new[metric] - old[metric] > noise:
+                regressions.append((name, metric, change))
+                flag = '  REGRESSION'
+        print(f"{name:<14}{changes[0]:>+10.1%}{changes[1]:>+10.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark suite for TernarySearchTree')
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help='run the scenarios')
+    run.add_argument('--output', help='write the results to this JSON file')
+    run.add_argument('--scenarios', nargs='*', choices=list(SCENARIOS))
+    run.add_argument('--runs', type=int, default=7)
+    run.add_argument('--warmup', type=int, default=1)
+    run.add_argument('--words', default='data/search_trees/corncob_lowercase.txt')
+    check = commands.add_parser('compare', help='compare two JSON results')
+    check.add_argument('before')
+    check.add_argument('after')
+    check.add_argument('--threshold', type=float, default=0.1)
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        run_suite(args)
+        return 0
+    with open(args.before) as file:
+        before = json.load(file)
+    with open(args.after) as file:
+        after = json.load(file)
+    regressions = compare(before, after, args.threshold)
+    for name, metric, change in regressions:
+        print(f"regression: {name} {metric} {change:+.1%} (threshold {args.threshold:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
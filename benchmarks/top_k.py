@@ -0,0 +1,45 @@
+"""
+top_k.py
+
+This script compares weighted autocomplete with TernarySearchTree.top_k() against listing every completion with completions() and sorting by a frequency dict, for short, high-fanout prefixes.
+Run from the repository root with: python -m benchmarks.top_k
+"""
+import random
+import time
+from ternary_search_tree import TernarySearchTree
+
+random.seed(42)
+nr_runs = 50
+
+# -------------------------------
+# LOAD DATASET
+# -------------------------------
+with open('data/search_trees/corncob_lowercase.txt') as file:
+    words = [line.strip() for line in file]
+
+# Zipf-like word frequencies
+frequency = {word: int(1_000_000 / rank) for rank, word in enumerate(random.sample(words, k=len(words)), 1)}
+tst = TernarySearchTree()
+for word in words:
+    tst.insert(word, frequency[word])
+
+
+def sort_completions(prefix, k):
+    return sorted(((word, frequency[word]) for word in tst.completions(prefix)),
+                  key=lambda match: -match[1])[:k]
+
+
+# -------------------------------
+# TOP-K BENCHMARK
+# -------------------------------
+print(f"{'prefix':<8}{'completions':>12}{'top_k (ms)':>14}{'sort all (ms)':>16}")
+for prefix in ('', 'c', 'co', 'pre', 'inter'):
+    assert [weight for _, weight in tst.top_k(prefix, 10)] == \
+        [weight for _, weight in sort_completions(prefix, 10)]
+    timings = []
+    for query in (tst.top_k, sort_completions):
+        start = time.perf_counter_ns()
+        for _ in range(nr_runs):
+            query(prefix, 10)
+        timings.append((time.perf_counter_ns() - start) / 1e6 / nr_runs)
+    print(f"{prefix!r:<8}{tst.count_prefix(prefix):>12}{timings[0]:>14.3f}{timings[1]:>16.3f}")
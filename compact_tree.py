@@ -0,0 +1,505 @@
+"""Three classes, NodeStore, CompactTernarySearchTree and
+FrozenTernarySearchTree, to store a Ternary Search Tree in parallel typed
+arrays instead of one Python object per node"""
+
+import mmap as _mmap
+import struct
+import sys
+from array import array
+
+from ternary_search_tree import TernarySearchTree
+
+NIL = -1  # index of a missing child
+WORDEND = 1  # flag bit: a word ends in this node
+EMPTY = 2  # flag bit: the empty string was inserted (root only)
+SHARED = 4  # flag bit: nodes are shared, the tree is read-only (root only)
+
+# binary image: header, then the chars, lt, eq, gt and flags arrays,
+# all little-endian
+MAGIC = b'TST1'
+VERSION = 1
+HEADER = struct.Struct('<4sIIiI')  # magic, version, nodes, root, strings
+
+
+class NodeStore:
+    """A struct-of-arrays store for Ternary Search Tree nodes
+
+    Node i is described by chars[i] (unicode code point), lt[i], eq[i] and
+    gt[i] (int32 indices of the children, NIL if missing) and flags[i]
+    (WORDEND / EMPTY bits).
+        Methods
+    ----------
+    from_buffer : read-only store on top of a buffer holding the arrays
+    add         : append a new node and return its index
+    __len__     : return number of nodes in the store
+    nbytes      : number of bytes used by the node arrays
+    tobytes     : the node arrays as one little-endian byte string
+    """
+
+    def __init__(self):
+        self.chars = array('I')
+        self.lt, self.eq, self.gt = array('i'), array('i'), array('i')
+        self.flags = array('B')
+
+    @classmethod
+    def from_buffer(cls, buffer, nodes, offset=0):
+        """ create a store whose arrays are views into buffer, which holds
+        nodes entries per array starting at offset; nothing is copied
+        Parameters
+        ----------
+        buffer : object supporting the buffer protocol
+        nodes  : int
+        offset : int
+
+        Returns
+        ----------
+        NodeStore
+        """
+        store = cls.__new__(cls)
+        view = memoryview(buffer)
+        width = 4 * nodes
+        store.chars = view[offset:offset + width].cast('I')
+        offset += width
+        store.lt = view[offset:offset + width].cast('i')
+        offset += width
+        store.eq = view[offset:offset + width].cast('i')
+        offset += width
+        store.gt = view[offset:offset + width].cast('i')
+        offset += width
+        store.flags = view[offset:offset + nodes]
+        return store
+
+    def tobytes(self):
+        parts = []
+        for a in (self.chars, self.lt, self.eq, self.gt):
+            if sys.byteorder == 'big':
+                a = array(a.typecode, a)
+                a.byteswap()
+            parts.append(a.tobytes())
+        parts.append(self.flags.tobytes())
+        return b''.join(parts)
+
+    def add(self, char):
+        """ append a node for char without children
+        Parameters
+        ----------
+        char : str
+
+        Returns
+        ----------
+        int
+        """
+        self.chars.append(ord(char))
+        self.lt.append(NIL)
+        self.eq.append(NIL)
+        self.gt.append(NIL)
+        self.flags.append(0)
+        return len(self.chars) - 1
+
+    def __len__(self):
+        return len(self.chars)
+
+    @property
+    def nbytes(self):
+        arrays = (self.chars, self.lt, self.eq, self.gt, self.flags)
+        return sum(a.itemsize * len(a) for a in arrays)
+
+
+class CompactTernarySearchTree:
+    """A Ternary Search Tree backed by a NodeStore, with the same public
+    interface as TernarySearchTree
+        Methods
+    ----------
+    from_tree      : build a compact copy of a TernarySearchTree
+    save           : write the tree to a binary file
+    load           : read a tree written by save, optionally memory-mapped
+    all_strings    : return all strings contained in the TST
+    __len__        : return number of strings in the TST
+    __repr__       : formatted string representation of TST
+    insert         : insert a string into the TST
+    search         : search for exact string or prefix in TST
+    iter_prefix    : lazily yield the strings in TST for given prefix
+    __iter__       : lazily yield the strings in TST in sorted order
+    nbytes         : number of bytes used by the node arrays
+    """
+
+    def __init__(self):
+        self._store = NodeStore()
+        self._root = NIL
+        self._size = 0
+        self._read_only = False
+
+    @classmethod
+    def from_tree(cls, tree: TernarySearchTree):
+        """ copy the nodes of a TernarySearchTree into a new compact tree
+        Parameters
+        ----------
+        tree : TernarySearchTree
+
+        Returns
+        ----------
+        CompactTernarySearchTree
+        """
+        compact = cls()
+        if tree._root is None:
+            return compact
+        store = compact._store
+        compact._root = store.add(tree._root._char)
+        # pairs of (TtreeNode, index of its copy in the store)
+        stack = [(tree._root, compact._root)]
+        while stack:
+            node, index = stack.pop()
+            flags = 0
+            if node.flag_wordend:
+                flags |= WORDEND
+                compact._size += 1
+            if node.flag_empty:
+                flags |= EMPTY
+                compact._size += 1
+            store.flags[index] = flags
+            for child, links in ((node._lt, store.lt), (node._eq, store.eq),
+                                 (node._gt, store.gt)):
+                if child is not None:
+                    links[index] = store.add(child._char)
+                    stack.append((child, links[index]))
+        return compact
+
+    def save(self, path):
+        """ write the tree as a flat, versioned binary image
+        Parameters
+        ----------
+        path : str
+
+        Returns
+        ----------
+
+        """
+        store = self._store
+        with open(path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, VERSION, len(store), self._root, self._size))
+            file.write(store.tobytes())
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """ read a tree written by save
+
+        With mmap=True the file is mapped read-only and queries are answered
+        straight from the mapped pages, so no per-node objects are created
+        and processes loading the same file share one page-cache copy. The
+        returned tree is then read-only. With mmap=False the arrays are
+        copied into memory and the tree can be extended.
+        Parameters
+        ----------
+        path : str
+        mmap : bool
+
+        Returns
+        ----------
+        CompactTernarySearchTree
+        """
+        with open(path, 'rb') as file:
+            if mmap and sys.byteorder == 'little':
+                buffer = _mmap.mmap(file.fileno(), 0, access=_mmap.ACCESS_READ)
+            else:
+                buffer = file.read()
+        if len(buffer) < HEADER.size:
+            raise ValueError(f'{path} is not a ternary search tree image')
+        magic, version, nodes, root, size = HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not a ternary search tree image')
+        # a later version may lay out the rest of the file differently
+        if version != VERSION:
+            raise ValueError(f'unsupported tree image version {version}')
+        if len(buffer) != HEADER.size + 17 * nodes:
+            raise ValueError(f'{path} is not a ternary search tree image')
+
+        tree = cls()
+        tree._root, tree._size = root, size
+        store = NodeStore.from_buffer(buffer, nodes, HEADER.size)
+        if isinstance(buffer, bytes):
+            # copy the views into growable arrays
+            for name in ('chars', 'lt', 'eq', 'gt', 'flags'):
+                values = getattr(store, name)
+                values = array(values.format, values.tobytes())
+                if sys.byteorder == 'big' and values.itemsize > 1:
+                    values.byteswap()
+                setattr(tree._store, name, values)
+        else:
+            tree._store = store
+            tree._read_only = True
+        if root != NIL and tree._store.flags[root] & SHARED:
+            # a node of a frozen tree may belong to many words
+            tree._read_only = True
+        return tree
+
+    @property
+    def nbytes(self):
+        return self._store.nbytes
+
+    def all_strings(self):
+        """ return all strings stored in TST
+        Parameters
+        ----------
+
+        Returns
+        ----------
+        List
+        """
+        if self._root == NIL:
+            return []
+        store = self._store
+        wordlist = []
+        if store.flags[self._root] & EMPTY:
+            wordlist.append("")
+        # pairs of (node index, prefix before the node's character)
+        stack = [(self._root, '')]
+        while stack:
+            index, pf = stack.pop()
+            word = pf + chr(store.chars[index])
+            if store.flags[index] & WORDEND:
+                wordlist.append(word)
+            if store.eq[index] != NIL:
+                stack.append((store.eq[index], word))
+            if store.gt[index] != NIL:
+                stack.append((store.gt[index], pf))
+            if store.lt[index] != NIL:
+                stack.append((store.lt[index], pf))
+        return wordlist
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        """ yield the strings in TST in sorted order, lazily """
+        if self._root == NIL:
+            return
+        store = self._store
+        if store.flags[self._root] & EMPTY:
+            yield ""
+        yield from self._iter_sorted(self._root, '')
+
+    def _iter_sorted(self, index, pf):
+        """ in-order traversal (lt, own word, eq, gt) of the strings below
+        node index, each prefixed with pf """
+        store = self._store
+        # entries: a word to yield, or (node index, prefix before the node)
+        stack = [(index, pf)]
+        while stack:
+            entry = stack.pop()
+            if type(entry) is str:
+                yield entry
+                continue
+            index, pf = entry
+            word = pf + chr(store.chars[index])
+            if store.gt[index] != NIL:
+                stack.append((store.gt[index], pf))
+            if store.eq[index] != NIL:
+                stack.append((store.eq[index], word))
+            if store.flags[index] & WORDEND:
+                stack.append(word)
+            if store.lt[index] != NIL:
+                stack.append((store.lt[index], pf))
+
+    def iter_prefix(self, prefix, limit=None):
+        """ lazily yield the strings in TST that start with prefix, in
+        sorted order
+        Parameters
+        ----------
+        prefix  : str
+        limit   : int or None, stop after this many strings
+
+        Returns
+        ----------
+        Generator
+        """
+        if prefix == "":
+            words = iter(self)
+        else:
+            index = self._psearch(prefix)
+            if index == NIL:
+                return
+            words = self._completions(index, prefix)
+        for n, word in enumerate(words):
+            if limit is not None and n >= limit:
+                return
+            yield word
+
+    def _completions(self, index, prefix):
+        store = self._store
+        if store.flags[index] & WORDEND:
+            yield prefix
+        if store.eq[index] != NIL:
+            yield from self._iter_sorted(store.eq[index], prefix)
+
+    def __repr__(self):
+        if self._root == NIL:
+            return 'empty tree'
+        store = self._store
+        lines = []
+        # triples of (node index, indent, label of the link leading to it)
+        stack = [(self._root, '', '')]
+        while stack:
+            index, indent, label = stack.pop()
+            flags = store.flags[index]
+            star = '*' if flags & WORDEND else ''
+            lines.append(f'{label}{indent}char: {chr(store.chars[index])}{star}, '
+                         f'{indent}Terminates: {bool(flags & WORDEND)}')
+            for links, link_label in ((store.gt, '_gt:'), (store.lt, '_lt:'),
+                                      (store.eq, '_eq:')):
+                if links[index] != NIL:
+                    stack.append((links[index], indent + '  ', link_label))
+        return '\n'.join(lines)
+
+    def insert(self, string):
+        """ insert a string into TST
+        Parameters
+        ----------
+        string : str
+
+        Returns
+        ----------
+
+        """
+        if self._read_only:
+            raise TypeError('tree is read-only')
+        store = self._store
+        if self._root == NIL:
+            # same sentinel root as TernarySearchTree for a leading empty string
+            self._root = store.add("*" if string == "" else string[0])
+
+        if string == "":
+            if not store.flags[self._root] & EMPTY:
+                store.flags[self._root] |= EMPTY
+                self._size += 1
+            return
+
+        chars, lt, eq, gt = store.chars, store.lt, store.eq, store.gt
+        index = self._root
+        i, last = 0, len(string) - 1
+        code = ord(string[0])
+        while True:
+            if code < chars[index]:
+                if lt[index] == NIL:
+                    lt[index] = store.add(string[i])
+                index = lt[index]
+            elif code > chars[index]:
+                if gt[index] == NIL:
+                    gt[index] = store.add(string[i])
+                index = gt[index]
+            else:
+                if i == last:
+                    if not store.flags[index] & WORDEND:
+                        store.flags[index] |= WORDEND
+                        self._size += 1
+                    return
+                i += 1
+                code = ord(string[i])
+                if eq[index] == NIL:
+                    eq[index] = store.add(string[i])
+                index = eq[index]
+
+    def _psearch(self, string):
+        """ return the index of the node matching the last character of
+        string, or NIL """
+        if self._root == NIL or len(string) == 0:
+            return NIL
+        store = self._store
+        chars, lt, eq, gt = store.chars, store.lt, store.eq, store.gt
+        index = self._root
+        i, last = 0, len(string) - 1
+        code = ord(string[0])
+        while index != NIL:
+            if code < chars[index]:
+                index = lt[index]
+            elif code > chars[index]:
+                index = gt[index]
+            else:
+                if i == last:
+                    return index
+                i += 1
+                code = ord(string[i])
+                index = eq[index]
+        return NIL
+
+    def search(self, prefix, exact=False):
+        """ method to search for words or prefixes
+        Parameters
+        ----------
+        prefix  : str
+        exact   : bool
+
+        Returns
+        ----------
+        Boolean
+        """
+        if self._root == NIL:
+            return False
+        store = self._store
+        if prefix == "":
+            # empty string is always a prefix
+            return not exact or bool(store.flags[self._root] & EMPTY)
+
+        index = self._psearch(prefix)
+        if index == NIL:
+            return False
+        if exact:
+            return bool(store.flags[index] & WORDEND)
+        return bool(store.flags[index] & WORDEND) or store.eq[index] != NIL
+
+
+class FrozenTernarySearchTree(CompactTernarySearchTree):
+    """A read-only, minimised CompactTernarySearchTree (a ternary DAWG) in
+    which identical subtrees, e.g. the tails of words with the same suffix,
+    are stored once and shared by all nodes linking to them
+        Methods
+    ----------
+    from_tree      : build the minimised graph of a TernarySearchTree
+    insert         : raise TypeError, the tree is read-only
+    (all queries of CompactTernarySearchTree)
+    """
+
+    @classmethod
+    def from_tree(cls, tree: TernarySearchTree):
+        """ copy the nodes of a TernarySearchTree into a new frozen tree,
+        merging subtrees with equal characters, flags and children
+        (hash-consing, children first)
+        Parameters
+        ----------
+        tree : TernarySearchTree
+
+        Returns
+        ----------
+        FrozenTernarySearchTree
+        """
+        frozen = cls()
+        frozen._read_only = True
+        if tree._root is None:
+            return frozen
+        store = frozen._store
+        # (char, flags, lt, eq, gt) -> index of the stored node
+        unique = {}
+        # index of the stored node of every TtreeNode, by id
+        stored = {}
+        # post-order walk: a node is stored once its children are
+        stack = [(tree._root, False)]
+        while stack:
+            node, ready = stack.pop()
+            children = (node._lt, node._eq, node._gt)
+            if not ready:
+                stack.append((node, True))
+                stack.extend((child, False) for child in children if child is not None)
+                continue
+            flags = WORDEND if node.flag_wordend else 0
+            if node is tree._root:
+                flags |= SHARED | (EMPTY if node.flag_empty else 0)
+            lt, eq, gt = (NIL if child is None else stored[id(child)] for child in children)
+            key = (node._char, flags, lt, eq, gt)
+            index = unique.get(key)
+            if index is None:
+                index = unique[key] = store.add(node._char)
+                store.flags[index] = flags
+                store.lt[index], store.eq[index], store.gt[index] = lt, eq, gt
+            stored[id(node)] = index
+        frozen._root = stored[id(tree._root)]
+        frozen._size = len(tree)
+        return frozen
@@ -0,0 +1,282 @@
+"""Two classes, SegmentNode and CompressedTernarySearchTree, to store a Ternary
+Search Tree whose chains of single middle children are collapsed into one
+node holding a string segment"""
+
+import sys
+from itertools import chain, islice
+
+
+class SegmentNode:
+    """A node of a path-compressed Ternary Search Tree
+
+    The node stands for the chain of TtreeNodes spelling its segment: the
+    first character is compared with the searched one and _lt/_gt lead to
+    the nodes with smaller/larger first characters, the other characters
+    of the segment are matched in a row and _eq continues after the last.
+    A word can only end at the end of a segment.
+    """
+
+    def __init__(self, chars: str, wordend=False):
+        self._chars = chars  # segment of at least one character
+        self._lt, self._gt, self._eq = None, None, None
+        self.flag_wordend = wordend  # a word ends with the last character
+
+    def _split(self, j):
+        """ keep the first j characters of the segment in this node and move
+        the others into a new middle child, which takes over _eq and the
+        word end """
+        tail = SegmentNode(self._chars[j:], self.flag_wordend)
+        tail._eq = self._eq
+        self._chars = self._chars[:j]
+        self._eq = tail
+        self.flag_wordend = False
+
+    def __repr__(self):
+        # star marks the end of a word
+        return f"{self._chars}{'*' if self.flag_wordend else ''}"
+
+
+class CompressedTernarySearchTree:
+    """A Ternary Search Tree of SegmentNodes, with the same search and
+    prefix semantics as TernarySearchTree but one node (and one pointer hop)
+    per unbranched run of characters instead of one per character
+        Methods
+    ----------
+    from_iterable  : build a tree in median-first insertion order
+    all_strings    : return all strings contained in the TST
+    __len__        : return number of strings in the TST
+    __repr__       : formatted string representation of TST
+    insert         : insert a string into the TST
+    search         : search for exact string or prefix in TST
+    iter_prefix    : lazily yield the strings in TST for given prefix
+    node_count     : number of nodes in the TST
+    nbytes         : estimated number of bytes used by the nodes
+    """
+
+    def __init__(self):
+        self._root = None
+        self._size = 0
+        self._empty = False  # the empty string was inserted
+
+    @classmethod
+    def from_iterable(cls, strings):
+        """ build a tree from strings in any order, inserting the median of
+        every range of the sorted strings before the rest of the range, as
+        TernarySearchTree.from_sorted shapes its siblings
+        Parameters
+        ----------
+        strings : iterable of str
+
+        Returns
+        ----------
+        CompressedTernarySearchTree
+        """
+        strings = sorted(set(strings))
+        tree = cls()
+        ranges = [(0, len(strings))] if strings else []
+        while ranges:
+            lo, hi = ranges.pop()
+            mid = (lo + hi) // 2
+            tree.insert(strings[mid])
+            if lo < mid:
+                ranges.append((lo, mid))
+            if mid + 1 < hi:
+                ranges.append((mid + 1, hi))
+        return tree
+
+    def __len__(self):
+        return self._size
+
+    def __repr__(self):
+        if self._root is None:
+            return 'empty tree'
+        lines = []
+        # triples of (node, indent, label of the link leading to it)
+        stack = [(self._root, '', '')]
+        while stack:
+            node, indent, label = stack.pop()
+            lines.append(f'{label}{indent}chars: {node!r}, '
+                         f'{indent}Terminates: {node.flag_wordend}')
+            for child, link_label in ((node._gt, '_gt:'), (node._lt, '_lt:'),
+                                      (node._eq, '_eq:')):
+                if child is not None:
+                    stack.append((child, indent + '  ', link_label))
+        return '\n'.join(lines)
+
+    def insert(self, string):
+        """ insert a string into TST, splitting a segment where the string
+        leaves it or ends inside it
+        Parameters
+        ----------
+        string : str
+
+        Returns
+        ----------
+
+        """
+        if string == "":
+            if not self._empty:
+                self._empty = True
+                self._size += 1
+            return
+        if self._root is None:
+            self._root = SegmentNode(string, True)
+            self._size += 1
+            return
+
+        node, i, last = self._root, 0, len(string)
+        while True:
+            chars = node._chars
+            char = string[i]
+            if char < chars[0]:
+                if node._lt is None:
+                    node._lt = SegmentNode(string[i:], True)
+                    break
+                node = node._lt
+            elif char > chars[0]:
+                if node._gt is None:
+                    node._gt = SegmentNode(string[i:], True)
+                    break
+                node = node._gt
+            else:
+                # match the rest of the segment
+                i, j = i + 1, 1
+                while j < len(chars) and i < last and string[i] == chars[j]:
+                    i += 1
+                    j += 1
+                if j < len(chars):
+                    node._split(j)
+                elif i < last and node._eq is None:
+                    node._eq = SegmentNode(string[i:], True)
+                    break
+                if i == last:
+                    if node.flag_wordend:
+                        return
+                    node.flag_wordend = True
+                    break
+                # the string goes on below the segment, or leaves the split
+                # segment at its new middle child
+                node = node._eq
+        self._size += 1
+
+    def _psearch(self, string):
+        """ return the node whose segment holds the last character of a
+        non-empty string, with the position of that character in the
+        segment, or (None, 0) """
+        node, i, last = self._root, 0, len(string)
+        while node is not None:
+            chars = node._chars
+            char = string[i]
+            if char < chars[0]:
+                node = node._lt
+            elif char > chars[0]:
+                node = node._gt
+            else:
+                i, j = i + 1, 1
+                while j < len(chars) and i < last:
+                    if string[i] != chars[j]:
+                        return None, 0
+                    i += 1
+                    j += 1
+                if i == last:
+                    return node, j - 1
+                node = node._eq
+        return None, 0
+
+    def search(self, prefix, exact=False):
+        """ method to search for words or prefixes
+        Parameters
+        ----------
+        prefix  : str
+        exact   : bool
+
+        Returns
+        ----------
+        Boolean
+        """
+        if prefix == "":
+            # empty string is always a prefix
+            return self._empty if exact else self._size > 0
+        node, j = self._psearch(prefix)
+        if node is None:
+            return False
+        if exact:
+            return node.flag_wordend and j == len(node._chars) - 1
+        # every node lies on the path of at least one word
+        return True
+
+    def _iter_strings(self, node, pf):
+        """ generator over the strings below node, each prefixed with pf """
+        # pairs of (node, prefix before the node's segment)
+        stack = [(node, pf)]
+        while stack:
+            node, pf = stack.pop()
+            word = pf + node._chars
+            if node.flag_wordend:
+                yield word
+            if node._eq is not None:
+                stack.append((node._eq, word))
+            if node._gt is not None:
+                stack.append((node._gt, pf))
+            if node._lt is not None:
+                stack.append((node._lt, pf))
+
+    def all_strings(self):
+        """ return all strings stored in TST
+        Parameters
+        ----------
+
+        Returns
+        ----------
+        List
+        """
+        return list(self.iter_prefix(""))
+
+    def iter_prefix(self, prefix, limit=None):
+        """ lazily yield the strings in TST that start with prefix
+        Parameters
+        ----------
+        prefix  : str
+        limit   : int or None, stop after this many strings
+
+        Returns
+        ----------
+        Generator
+        """
+        if self._root is None and not self._empty:
+            return
+        if prefix == "":
+            words = self._iter_strings(self._root, "") if self._root is not None else iter(())
+            if self._empty:
+                words = chain([""], words)
+        else:
+            node, j = self._psearch(prefix)
+            if node is None:
+                return
+            words = self._completions(node, prefix + node._chars[j + 1:])
+        yield from islice(words, limit)
+
+    def _completions(self, node, word):
+        """ word if it ends with node's segment, then the strings below """
+        if node.flag_wordend:
+            yield word
+        if node._eq is not None:
+            yield from self._iter_strings(node._eq, word)
+
+    def node_count(self):
+        """ return the number of nodes in TST """
+        return sum(1 for _ in self._nodes())
+
+    @property
+    def nbytes(self):
+        """ size of all SegmentNode objects, their attribute dicts and
+        segment strings in bytes """
+        return sum(sys.getsizeof(node) + sys.getsizeof(node.__dict__) + sys.getsizeof(node._chars)
+                   for node in self._nodes())
+
+    def _nodes(self):
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(child for child in (node._lt, node._eq, node._gt) if child is not None)
@@ -0,0 +1,261 @@
+"""A class, ShardedTernarySearchTree, that splits the strings of a Ternary
+Search Tree over several worker processes by ranges of their first character"""
+
+import multiprocessing
+from bisect import bisect_right
+from collections import Counter
+from heapq import nlargest
+
+from ternary_search_tree import TernarySearchTree
+
+
+def _serve(connection):
+    """ worker loop: own one TernarySearchTree and answer method calls
+    (name, args) sent over connection until None is received """
+    tree = TernarySearchTree()
+    while True:
+        request = connection.recv()
+        if request is None:
+            break
+        name, args = request
+        try:
+            if name == 'build':
+                tree = TernarySearchTree.from_iterable(*args)
+                result = len(tree)
+            elif name == 'insert':
+                # answer with the number of new strings (0 or 1)
+                size = len(tree)
+                tree.insert(*args)
+                result = len(tree) - size
+            else:
+                result = getattr(tree, name)(*args)
+                if name == 'iter_prefix':
+                    result = list(result)
+        except Exception as error:
+            connection.send((False, error))
+        else:
+            connection.send((True, result))
+    connection.close()
+
+
+class ShardedTernarySearchTree:
+    """A Ternary Search Tree split over worker processes, one shard per
+    range of first characters, so that building and batch queries use
+    several cores
+        Methods
+    ----------
+    close          : stop the worker processes
+    __len__        : return number of strings in all shards
+    insert         : insert a string into its shard
+    search         : search for exact string or prefix in its shard
+    search_many    : search for many strings or prefixes, shards in parallel
+    contains_many  : search for many exact strings, shards in parallel
+    count_prefix   : return number of strings starting with prefix
+    completions    : return the strings for given prefix, in shard order
+    top_k          : return the k heaviest strings for given prefix
+    """
+
+    def __init__(self, strings=(), workers=None):
+        """ split strings by first character into shards of similar size
+        and build one TernarySearchTree per worker process in parallel
+        Parameters
+        ----------
+        strings : iterable of str
+        workers : int or None, number of processes (default: CPU count)
+        """
+        strings = list(strings)
+        workers = workers or multiprocessing.cpu_count()
+
+        # cut the sorted first characters into ranges of similar word counts;
+        # shard i holds the strings whose first character c satisfies
+        # bounds[i - 1] <= c < bounds[i], with "" in shard 0
+        firsts = Counter(string[:1] for string in strings)
+        chars = sorted(firsts)
+        self._bounds, total, seen = [], len(strings), 0
+        for char in chars:
+            if seen >= total * (len(self._bounds) + 1) / workers and char:
+                self._bounds.append(char)
+            seen += firsts[char]
+            if len(self._bounds) == workers - 1:
+                break
+
+        shards = [[] for _ in range(len(self._bounds) + 1)]
+        for string in strings:
+            shards[self._shard(string)].append(string)
+
+        self._connections, self._processes = [], []
+        for shard in shards:
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_serve, args=(child,), daemon=True)
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+        self._size = sum(self._broadcast('build', [(shard,) for shard in shards]))
+
+    def _shard(self, string):
+        """ index of the shard owning string """
+        return bisect_right(self._bounds, string[:1])
+
+    def _call(self, shard, name, *args):
+        self._connections[shard].send((name, args))
+        return self._receive(shard)
+
+    def _receive(self, shard):
+        ok, result = self._connections[shard].recv()
+        if not ok:
+            raise result
+        return result
+
+    def _broadcast(self, name, args, shards=None):
+        """ send one call per shard before waiting for any of them, so the
+        shards work in parallel; return the results in shard order """
+        shards = range(len(self._connections)) if shards is None else shards
+        for shard, shard_args in zip(shards, args):
+            self._connections[shard].send((name, shard_args))
+        # read every reply before raising, or the unread ones would answer
+        # the next calls to their shards
+        replies = [self._connections[shard].recv() for shard in shards]
+        for ok, result in replies:
+            if not ok:
+                raise result
+        return [result for _, result in replies]
+
+    def close(self):
+        """ stop the worker processes """
+        for connection, process in zip(self._connections, self._processes):
+            connection.send(None)
+            connection.close()
+            process.join()
+        self._connections, self._processes = [], []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self._size
+
+    def insert(self, string, weight=None):
+        """ insert a string into the shard owning it
+        Parameters
+        ----------
+        string : str
+        weight : number or None, see TernarySearchTree.insert
+
+        Returns
+        ----------
+
+        """
+        self._size += self._call(self._shard(string), 'insert', string, weight)
+
+    def search(self, prefix, exact=False):
+        """ search for a word or prefix in the shard owning it
+        Parameters
+        ----------
+        prefix  : str
+        exact   : bool
+
+        Returns
+        ----------
+        Boolean
+        """
+        if prefix == "" and not exact:
+            return self._size > 0
+        return self._call(self._shard(prefix), 'search', prefix, exact)
+
+    def search_many(self, keys, exact=False):
+        """ search for many words or prefixes, each shard answering its part
+        of the batch in parallel
+        Parameters
+        ----------
+        keys  : iterable of str
+        exact : bool
+
+        Returns
+        ----------
+        List of Boolean in the order of keys
+        """
+        keys = list(keys)
+        positions = [[] for _ in self._connections]
+        for position, key in enumerate(keys):
+            positions[self._shard(key)].append(position)
+        shards = [shard for shard, owned in enumerate(positions) if owned]
+        answers = self._broadcast(
+            'search_many', [([keys[i] for i in positions[shard]], exact) for shard in shards], shards)
+
+        results = [False] * len(keys)
+        for shard, found in zip(shards, answers):
+            for position, result in zip(positions[shard], found):
+                results[position] = result
+        if not exact:
+            # "" is a prefix of every string in any shard
+            for position in positions[0]:
+                if keys[position] == "":
+                    results[position] = self._size > 0
+        return results
+
+    def contains_many(self, keys):
+        """ search for many exact words, see search_many
+        Parameters
+        ----------
+        keys : iterable of str
+
+        Returns
+        ----------
+        List of Boolean in the order of keys
+        """
+        return self.search_many(keys, exact=True)
+
+    def count_prefix(self, prefix):
+        """ count the strings that start with prefix
+        Parameters
+        ----------
+        prefix  : str
+
+        Returns
+        ----------
+        int
+        """
+        if prefix == "":
+            return self._size
+        return self._call(self._shard(prefix), 'count_prefix', prefix)
+
+    def completions(self, prefix, limit=None):
+        """ return the strings that start with prefix, at most limit of them;
+        the empty prefix asks all shards
+        Parameters
+        ----------
+        prefix  : str
+        limit   : int or None
+
+        Returns
+        ----------
+        List
+        """
+        if prefix != "":
+            return self._call(self._shard(prefix), 'iter_prefix', prefix, limit)
+        words = []
+        for found in self._broadcast('iter_prefix', [(prefix, limit)] * len(self._connections)):
+            words.extend(found)
+        return words if limit is None else words[:limit]
+
+    def top_k(self, prefix, k):
+        """ return the k heaviest strings that start with prefix, merging the
+        answers of all shards for the empty prefix
+        Parameters
+        ----------
+        prefix : str
+        k      : int
+
+        Returns
+        ----------
+        List of (str, weight) pairs, heaviest first
+        """
+        if prefix != "":
+            return self._call(self._shard(prefix), 'top_k', prefix, k)
+        answers = self._broadcast('top_k', [(prefix, k)] * len(self._connections))
+        return nlargest(k, (match for found in answers for match in found),
+                        key=lambda match: match[1])
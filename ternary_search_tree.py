@@ -1,6 +1,40 @@
 """Two classes, TtreeNode and TernarySearchTree to allow inserting and searching
 words in a Ternary Search Tree framework"""
 
+import re
+import sys
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, namedtuple
+from heapq import heappop, heappush
+from itertools import count, islice
+
+try:
+    import numpy
+except ImportError:  # numpy is only needed for array results
+    numpy = None
+
+
+_NO_WEIGHT = float('-inf')  # maximum weight of a subtree without words
+_MAX_CHAR = chr(sys.maxunicode)  # the largest character, U+10FFFF
+
+
+def _count_walk(counts, visits, lt_steps):
+    """ add a walk of visits nodes to the counters [calls, visits,
+    comparisons, max_visits] of an operation (see
+    TernarySearchTree.instrument); a step to _lt costs one comparison
+    (char < node char), any other step two """
+    counts[1] += visits
+    counts[2] += 2 * visits - lt_steps
+    if visits > counts[3]:
+        counts[3] = visits
+
+
+def _height(node):
+    """ height of a sibling subtree, 0 if node is None; a node holding no
+    word has length 0, so it must not be tested for truth """
+    return node._height if node is not None else 0
+
 
 class TtreeNode:
     """A class for node objects belonging to a Ternary Search Tree
@@ -11,47 +45,209 @@ class TtreeNode:
     _to_string  :
     __repr__    : formatted string representation of TST
     _insert     : insert a string into the TST
+    _add        : insert a string, counting it on the way down
     _psearch    : search TST for given prefix
+    _siblings   : list the nodes linked to this one by _lt/_gt in order
+    _copy       : shallow copy of this node, sharing its children
+    _copy_path  : copy this node and the nodes on the search path of a string
+    _copy_tree  : copy this node and every node below it
+    _update     : recompute word counter, weight bound and sibling height
+    _balance    : rotate the sibling subtree back into AVL balance
+    _detach     : unlink this node from its siblings
     """
     
+    # defaults shared by all nodes, set on a node only when they differ:
+    # _value, the payload of the word ending in this node (TSTMap), and
+    # the fields used by weighted (top_k) and balanced trees, so that the
+    # nodes of a plain tree do not pay for them
+    _value = None
+    _weight = 0  # weight of the word ending in this node
+    _max_weight = 0  # largest word weight in this node or below; every
+                     # node lies on the path of a word, unweighted ones weigh 0
+    _height = 1  # height of the _lt/_gt subtree, kept in balanced trees
+
     def __init__(self, char: str):
         self.root = None
-        self.string = None
         self._char = char  # value already stored in node x, store as attribute of this node
         self._lt, self._gt, self._eq = None, None, None  # less, equal, greater children
         self.flag_wordend = False  # mark the end of a word
         self.flag_empty = False  # mark empty string
+        self._count = 0  # number of words ending in this node or below it
+
+    def _iter_strings(self, pf=''):
+        """ generator over all strings stored in this node and below it,
+        each prefixed with pf, using an explicit stack instead of recursion
+        """
+        # pairs of (node, prefix before the node's character)
+        stack = [(self, pf)]
+        while stack:
+            node, pf = stack.pop()
+            word = pf + node._char
+
+            # if empty string was inserted: yield it
+            if node.flag_empty:
+                yield ""
+
+            # if word was found: yield it
+            if node.flag_wordend:
+                yield word
+
+            # visit _lt, then _gt, then _eq subtrees (pushed in reverse)
+            if node._eq is not None:
+                stack.append((node._eq, word))
+            if node._gt is not None:
+                stack.append((node._gt, pf))
+            if node._lt is not None:
+                stack.append((node._lt, pf))
 
     def _all_strings(self, pf=''):
+        return list(self._iter_strings(pf))
 
-        final_wordlist = []
-        
-        word = pf + self._char
+    def _siblings(self):
+        """ in-order list of the nodes in the binary search tree formed by
+        this node and its _lt/_gt descendants """
+        nodes, stack, node = [], [], self
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node._lt
+            node = stack.pop()
+            nodes.append(node)
+            node = node._gt
+        return nodes
 
-        # if empty string was inserted: add to list
-        if self.flag_empty:
-            final_wordlist.append("")
+    def _copy(self):
+        copy = TtreeNode.__new__(TtreeNode)
+        copy.__dict__ = self.__dict__.copy()
+        return copy
 
-        # if word was found: add to list
-        if self.flag_wordend:
-            final_wordlist.append(word)
+    def _copy_path(self, string):
+        """ copy this node and every existing node on the search path of
+        string, linking the copies to each other; all other nodes are shared
+        with the original tree
+        Parameters
+        ----------
+        string : str
 
-        # traverse tree as long as children exist and no word end was found
-        if self._lt is not None:
-            final_wordlist.extend(self._lt._all_strings(pf))
-        if self._gt is not None:
-            final_wordlist.extend(self._gt._all_strings(pf))
-        if self._eq is not None:
-            # collect all words found and add to list
-            words = self._eq._all_strings(word)
-            final_wordlist.extend(words)
+        Returns
+        ----------
+        TtreeNode, copy of this node
+        """
+        new = TtreeNode.__new__
+        top = node = self._copy()
+        if len(string) == 0:
+            return top
+        i, last = 0, len(string) - 1
+        char = string[0]
+        while True:
+            if char < node._char:
+                child = node._lt
+                if child is None:
+                    return top
+                node._lt = node = new(TtreeNode)
+            elif char > node._char:
+                child = node._gt
+                if child is None:
+                    return top
+                node._gt = node = new(TtreeNode)
+            elif i == last:
+                return top
+            else:
+                i += 1
+                char = string[i]
+                child = node._eq
+                if child is None:
+                    return top
+                node._eq = node = new(TtreeNode)
+            node.__dict__ = child.__dict__.copy()
+
+    def _copy_tree(self):
+        """ copy this node and every node below it """
+        top = self._copy()
+        stack = [top]
+        while stack:
+            node = stack.pop()
+            for link in ('_lt', '_gt', '_eq'):
+                child = getattr(node, link)
+                if child is not None:
+                    child = child._copy()
+                    setattr(node, link, child)
+                    stack.append(child)
+        return top
+
+    def _update(self):
+        """ recompute _count, _max_weight and _height from the children """
+        lt, gt, eq = self._lt, self._gt, self._eq
+        self._count = (self.flag_wordend + (lt._count if lt is not None else 0)
+                       + (gt._count if gt is not None else 0)
+                       + (eq._count if eq is not None else 0))
+        height = 1 + max(_height(lt), _height(gt))
+        if height != self._height:
+            self._height = height
+        best = self._weight if self.flag_wordend else _NO_WEIGHT
+        for child in (lt, gt, eq):
+            if child is not None and child._max_weight > best:
+                best = child._max_weight
+        if best != self._max_weight:
+            self._max_weight = best
+
+    def _rotate_left(self, copy=False):
+        pivot = self._gt._copy() if copy else self._gt
+        self._gt, pivot._lt = pivot._lt, self
+        if self._move_empty_flag(pivot):
+            pivot._lt = self._detach(True, copy)
+        else:
+            self._update()
+        pivot._update()
+        return pivot
 
-        return final_wordlist
+    def _rotate_right(self, copy=False):
+        pivot = self._lt._copy() if copy else self._lt
+        self._lt, pivot._gt = pivot._gt, self
+        if self._move_empty_flag(pivot):
+            pivot._gt = self._detach(True, copy)
+        else:
+            self._update()
+        pivot._update()
+        return pivot
+
+    def _move_empty_flag(self, pivot):
+        """ keep the empty string flag at the top of the root siblings when
+        pivot is rotated above this node; return True if this node is left
+        without a word or middle child, i.e. it was the "*" sentinel created
+        for the empty string, and has to be unlinked """
+        if not self.flag_empty:
+            return False
+        pivot.flag_empty, self.flag_empty = True, False
+        return not self.flag_wordend and self._eq is None
+
+    def _balance(self, copy=False):
+        """ restore the AVL condition of the sibling subtree rooted here
+        Parameters
+        ----------
+        copy : bool, rotate copies of the children instead of the children
+               themselves, which may be shared with a snapshot
+
+        Returns
+        ----------
+        new root of the sibling subtree
+        """
+        lt, gt = self._lt, self._gt
+        skew = _height(lt) - _height(gt)
+        if skew > 1:
+            if _height(lt._lt) < _height(lt._gt):
+                self._lt = (lt._copy() if copy else lt)._rotate_left(copy)
+            return self._rotate_right(copy)
+        if skew < -1:
+            if _height(gt._gt) < _height(gt._lt):
+                self._gt = (gt._copy() if copy else gt)._rotate_right(copy)
+            return self._rotate_left(copy)
+        return self
     
 
     def __len__(self):
         """return length of search tree as number of inserted strings"""
-        return len(self._all_strings())
+        return self._count + self.flag_empty
 
     def _to_string(self, indent=' '):
         terminates = f'Terminates: {self.flag_wordend}'
@@ -69,90 +265,318 @@ class TtreeNode:
         # star marks the end of a word
         return f"{self._char}{'*' if self.flag_wordend else ''}"
     
-    def _insert(self, string):
-        """ Recursive function to save characters from inserted words as ttree nodes
+    def _insert(self, string, counts=None):
+        """ Iterative function to save characters from inserted words as ttree nodes
         Parameters
         ----------
         string : str
+        counts : list or None, operation counters the walk is added to
 
         Returns
         ----------
-        
+        (list of visited nodes, ending with the node where string ends,
+        True if string was not stored yet)
         """
 
         # mark empty string case
         if len(string) == 0:
+            if self.flag_empty:
+                return [], False
             self.flag_empty = True
+            return [], True
 
-        else:
-            char = string[0]
-            if char < self._char:
-                if self._lt is None:
-                    self._lt = TtreeNode(char)
-                self._lt._insert(string)  # always recurse
-
-            elif char > self._char:
-                if self._gt is None:
-                    self._gt = TtreeNode(char)
-                self._gt._insert(string)  # always recurse
-
-            else:  # char == self._char
-                if len(string) == 1:
-                    self.flag_wordend = True
-                else:
-                    # if node with matched char was found:
-                    # traverse tree
-                    next_char = string[1]
-                    if self._eq is None:
-                        self._eq = TtreeNode(next_char)
-                    self._eq._insert(string[1:])
+        # walk the tree with an index into string instead of slicing it
+        node = self
+        path = [node]  # every visited node, so its length counts the visits
+        i, last = 0, len(string) - 1
+        char = string[0]
+        lt_steps = 0
+        while True:
+            if char < node._char:
+                lt_steps += 1
+                if node._lt is None:
+                    node._lt = TtreeNode(char)
+                node = node._lt
+
+            elif char > node._char:
+                if node._gt is None:
+                    node._gt = TtreeNode(char)
+                node = node._gt
+
+            else:  # char == node._char
+                if i == last:
+                    if counts is not None:
+                        _count_walk(counts, len(path), lt_steps)
+                    if node.flag_wordend:
+                        return path, False
+                    node.flag_wordend = True
+                    return path, True
+                # if node with matched char was found:
+                # continue with the next character in the middle child
+                i += 1
+                char = string[i]
+                if node._eq is None:
+                    node._eq = TtreeNode(char)
+                node = node._eq
+            path.append(node)
    
 
-    def _psearch(self, string):
+    def _add(self, string, weight, counts=None):
+        """ insert a non-empty string like _insert, but add it and its
+        weight to the counters and weight bounds of the nodes on the way
+        down, which is all an unbalanced tree needs; a string that was
+        stored already is taken off them again
+        Parameters
+        ----------
+        string : str
+        weight : number
+        counts : list or None, operation counters the walk is added to
+
+        Returns
+        ----------
+        (node where string ends, True if string was not stored yet)
+        """
+        node = self
+        path = []  # every visited node, in case string was stored already
+        i, last = 0, len(string) - 1
+        char = string[0]
+        lt_steps = 0
+        raised = False  # a weight bound was raised for the string
+        while True:
+            path.append(node)
+            if node._count:
+                if weight > node._max_weight:
+                    node._max_weight = weight
+                    raised = True
+            elif weight != node._max_weight:
+                # a new node only holds the new word
+                node._max_weight = weight
+            node._count += 1
+            if char < node._char:
+                lt_steps += 1
+                if node._lt is None:
+                    node._lt = TtreeNode(char)
+                node = node._lt
+
+            elif char > node._char:
+                if node._gt is None:
+                    node._gt = TtreeNode(char)
+                node = node._gt
+
+            else:  # char == node._char
+                if i == last:
+                    break
+                i += 1
+                char = string[i]
+                if node._eq is None:
+                    node._eq = TtreeNode(char)
+                node = node._eq
+        if counts is not None:
+            _count_walk(counts, len(path), lt_steps)
+        if not node.flag_wordend:
+            node.flag_wordend = True
+            return node, True
+        # stored already: take the string off its path again
+        for node in reversed(path):
+            node._count -= 1
+            if raised:
+                best = node._weight if node.flag_wordend else _NO_WEIGHT
+                for child in (node._lt, node._gt, node._eq):
+                    if child is not None and child._max_weight > best:
+                        best = child._max_weight
+                if best != node._max_weight:
+                    node._max_weight = best
+        return path[-1], False
+
+    def _psearch(self, string, counts=None):
         """given a node and a prefix string, search TST for its existence
         Parameters
         ----------
         string : str
+        counts : list or None, operation counters the walk is added to
 
         Returns
         ----------
-        self or None
+        node matching the last character of string, or None
         """
 
-        self.string = string
+        # no node stores the empty string
+        if len(string) == 0:
+            return None
 
-        if len(string) > 1:
-            char = string[0]  # first character of search word
-            rest = string[1::]
-        else:
-            char = string
-            rest = string
-
-        # if character is found:
-        if char == self._char:
-            if len(string) == 1:
-                return self
-            elif len(string) > 1:
-                # traverse tree for string rest as long as children exist
-                if self._eq is not None:
-                    return self._eq._psearch(rest)
+        node = self
+        i, last = 0, len(string) - 1
+        char = string[0]
+        visits = lt_steps = 0
+        while node is not None:
+            visits += 1
+            if char < node._char:
+                lt_steps += 1
+                node = node._lt
+            elif char > node._char:
+                node = node._gt
+            else:  # char == node._char
+                if i == last:
+                    break
+                i += 1
+                char = string[i]
+                node = node._eq
+        if counts is not None:
+            _count_walk(counts, visits, lt_steps)
+        return node
+        
+
+
+    def _detach(self, balanced=False, copy=False):
+        """ remove this node from the binary search tree of its siblings,
+        replacing it by its in-order successor if it has two children
+        Parameters
+        ----------
+        balanced : bool, restore the AVL condition on the way
+        copy     : bool, relink copies of the siblings instead of the
+                   siblings themselves, which may be shared with a snapshot
+
+        Returns
+        ----------
+        new root of the sibling subtree, or None
+        """
+        lt, gt = self._lt, self._gt
+        if lt is None:
+            return gt
+        if gt is None:
+            return lt
+        # the successor is the leftmost node below _gt
+        chain, successor = [], gt._copy() if copy else gt
+        while successor._lt is not None:
+            chain.append(successor)
+            successor = successor._lt._copy() if copy else successor._lt
+        if chain:
+            chain[-1]._lt = successor._gt
+            for j in range(len(chain) - 1, -1, -1):
+                node = chain[j]
+                node._update()
+                top = node._balance(copy) if balanced else node
+                if j:
+                    chain[j - 1]._lt = top
                 else:
-                    return None
+                    gt = top
+            successor._gt = gt
+        successor._lt = lt
+        successor._update()
+        return successor._balance(copy) if balanced else successor
 
-        elif char < self._char:
-            # traverse tree to look for a match
-            if self._lt is not None:
-                return self._lt._psearch(string)
-            else:
-                return None
 
-        elif char > self._char:
-            # traverse tree to look for a match
-            if self._gt is not None:
-                return self._gt._psearch(string)
-            else:
-                return None
-        
+def _link_balanced(nodes):
+    """ link a sorted list of sibling nodes into a height-balanced binary
+    search tree over _lt/_gt, keeping their _eq children
+    Parameters
+    ----------
+    nodes : list of TtreeNode
+
+    Returns
+    ----------
+    TtreeNode, root of the sibling tree
+    """
+    root, linked = None, []
+    # ranges: (first node, end of nodes, parent node, link)
+    ranges = [(0, len(nodes), None, None)]
+    while ranges:
+        lo, hi, parent, link = ranges.pop()
+        mid = (lo + hi) // 2
+        node = nodes[mid]
+        node._lt = node._gt = None
+        if parent is None:
+            root = node
+        else:
+            setattr(parent, link, node)
+        linked.append(node)
+        if lo < mid:
+            ranges.append((lo, mid, node, '_lt'))
+        if mid + 1 < hi:
+            ranges.append((mid + 1, hi, node, '_gt'))
+    # children were linked after their parents
+    for node in reversed(linked):
+        node._update()
+    return root
+
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses evictions maxsize currsize')
+
+
+class _PrefixCache:
+    """A size-bounded LRU cache for query results keyed by
+    (prefix, mode, limit), indexed by prefix so that inserting a word only
+    drops the entries for prefixes of that word
+        Methods
+    ----------
+    get        : return a cached result or _MISSING, counting hits and misses
+    put        : store a result, evicting the least recently used entry
+    invalidate : drop the entries whose result may change when word is added
+    clear      : drop all entries
+    info       : return hit, miss and eviction counters as CacheInfo
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.by_prefix = {}  # prefix -> set of keys in entries
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        try:
+            result = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return _MISSING
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        if self.maxsize <= 0:
+            return
+        self.entries[key] = result
+        self.by_prefix.setdefault(key[0], set()).add(key)
+        if len(self.entries) > self.maxsize:
+            old, _ = self.entries.popitem(last=False)
+            self._unindex(old)
+            self.evictions += 1
+
+    def _unindex(self, key):
+        keys = self.by_prefix[key[0]]
+        keys.discard(key)
+        if not keys:
+            del self.by_prefix[key[0]]
+
+    def invalidate(self, word):
+        """ drop the entries for prefixes of word; exact entries only
+        change for word itself """
+        if not self.entries:
+            return
+        for i in range(len(word) + 1):
+            keys = self.by_prefix.get(word[:i])
+            if not keys:
+                continue
+            for key in list(keys):
+                if key[1] != 'exact' or i == len(word):
+                    del self.entries[key]
+                    self._unindex(key)
+
+    def clear(self):
+        self.entries.clear()
+        self.by_prefix.clear()
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.evictions,
+                         self.maxsize, len(self.entries))
+
+
+_MISSING = object()  # marks a cache miss or a missing value, since both may be falsy
+
+TreeStats = namedtuple('TreeStats', 'nodes keys max_depth mean_depth depth_histogram '
+                                    'chain_lengths nbytes')
+OpCounts = namedtuple('OpCounts', 'calls visits comparisons max_visits')
+IngestReport = namedtuple('IngestReport', 'lines keys seconds keys_per_second')
 
 
 class TernarySearchTree:
@@ -161,15 +585,208 @@ class TernarySearchTree:
     ----------
     all_strings    : print all strings contained in the TST
     __len__        : return number of strings in the TST
+    __iter__       : lazily yield the strings in the TST in sorted order
+    __contains__   : search for an exact string in the TST
+    range          : lazily yield the strings in the TST between two bounds
+    keys_from      : return a page of strings in sorted order from a start
     __repr__       : formatted string representation of TST
-     insert        : insert a string into the TST
+     insert        : insert a string into the TST, optionally with a weight
+    insert_from_file : insert the lines of a text file, streamed in chunks
+    top_k          : return the k heaviest strings in TST for given prefix
+    remove         : remove a string from the TST, KeyError if missing
+    discard        : remove a string from the TST if present
     prefix_search  : return wordlist of all strings in TST for given prefix
+    iter_prefix    : lazily yield the strings in TST for given prefix
     search         : search for exact string or prefix in TST
+    completions    : return the strings in TST for given prefix, cached
+    fuzzy_search   : return the strings in TST within an edit distance
+    match          : lazily yield the strings in TST matching a wildcard pattern
+    cache_info     : return hit, miss and eviction counters of the cache
+    cache_clear    : drop all cached query results
+    stats          : return node count, depths and sibling chain lengths of the TST
+    instrument     : start or stop counting node visits of insert and search
+    op_counts      : return the counted visits and comparisons per operation
+    search_many    : search for many strings or prefixes in one pass
+    contains_many  : search for many exact strings in one pass
+    from_iterable  : build a balanced TST from any iterable of strings
+    from_sorted    : build a balanced TST from sorted, unique strings
+    rebalance      : rebuild every group of sibling nodes as a balanced tree
+    union          : return a new TST with the strings of both TSTs
+    intersection   : return a new TST with the strings common to both TSTs
+    difference     : return a new TST with the strings not in another TST
+    issubset       : test whether every string is in another TST
+    snapshot       : return a read-only view of the TST that later writes leave unchanged
+    save           : write the TST to a flat binary file
+    load           : map a file written by save for read-only queries
+    freeze         : return a minimised read-only copy sharing equal subtrees
+    count_prefix   : return number of strings in TST starting with prefix
+    longest_prefix_of : return the longest string in TST that is a prefix of a text
+    prefixes_of    : return all strings in TST that are prefixes of a text
+    rank           : return number of strings in TST smaller than a string
+    select         : return the string at a given position in sorted order
     """
     
-    def __init__(self):
+    def __init__(self, balanced=False, cache_size=None, persistent=False):
         self._root = None
+        self._size = 0  # number of stored strings, including ""
+        # keep sibling chains height-balanced (AVL) on every insert
+        self._balanced = balanced
+        self._empty_weight = 0  # weight of "", which has no node of its own
+        # LRU cache of query results, None if disabled
+        self._cache = None if cache_size is None else _PrefixCache(cache_size)
+        # copy-on-write: writes copy the nodes they change and then publish
+        # a new root, so readers holding the old root are never disturbed
+        self._persistent = persistent
+        self._read_only = False
+        # per operation: calls, visits, comparisons, max_visits; None if off
+        self._ops = None
+
+    @classmethod
+    def from_iterable(cls, strings, balanced=False, cache_size=None, persistent=False):
+        """ build a balanced TST from strings in any order
+        Parameters
+        ----------
+        strings    : iterable of str
+        balanced   : bool, keep the tree balanced on later inserts
+        cache_size : int or None, size of the query cache
+        persistent : bool, copy-on-write for later writes
+
+        Returns
+        ----------
+        TernarySearchTree
+        """
+        return cls.from_sorted(sorted(set(strings)), balanced, cache_size, persistent)
+
+    @classmethod
+    def from_sorted(cls, strings, balanced=False, cache_size=None, persistent=False):
+        """ build a balanced TST from a sorted list of unique strings
+
+        Every group of sibling nodes becomes a binary search tree rooted at
+        the character of the group's median word, the same shape as inserting
+        the words in median-first order, but built one character level at a
+        time without walking the tree for each word.
+        Parameters
+        ----------
+        strings    : list of str, sorted and without duplicates
+        balanced   : bool, keep the tree balanced on later inserts
+        cache_size : int or None, size of the query cache
+        persistent : bool, copy-on-write for later writes
+
+        Returns
+        ----------
+        TernarySearchTree
+        """
+        for i in range(1, len(strings)):
+            if strings[i - 1] >= strings[i]:
+                raise ValueError('strings must be sorted and unique')
+
+        tree = cls(balanced, cache_size, persistent)
+        tree._size = len(strings)
+        start = 0
+        if strings and strings[0] == "":
+            start = 1
+            if len(strings) == 1:
+                tree._root = TtreeNode("*")
+
+        # jobs: (first word, end of words, depth, parent node, link)
+        # all words strings[first:end] share their first depth characters
+        jobs = [(start, len(strings), 0, None, '_root')] if len(strings) > start else []
+        while jobs:
+            first, end, depth, parent, link = jobs.pop()
+
+            # group the words by their character at position depth,
+            # finding the end of each group by bisection
+            head = strings[first][:depth]
+            chars, bounds = [], []
+            i = first
+            while i < end:
+                char = strings[i][depth]
+                chars.append(char)
+                bounds.append(i)
+                if char == _MAX_CHAR:
+                    # no code point follows it: the group takes the rest
+                    break
+                i = bisect_left(strings, head + chr(ord(char) + 1), i + 1, end)
+            bounds.append(end)
+
+            # link the groups as a binary search tree over their characters
+            # ranges: (first group, end of groups, parent node, link)
+            ranges = [(0, len(chars), parent, link)]
+            while ranges:
+                glo, ghi, parent, link = ranges.pop()
+                # the group containing the median word becomes the sibling root
+                median = (bounds[glo] + bounds[ghi] - 1) // 2
+                g = bisect_right(bounds, median, glo, ghi) - 1
+                node = TtreeNode(chars[g])
+                node._count = bounds[ghi] - bounds[glo]
+                setattr(tree if parent is None else parent, link, node)
+
+                # the shortest word of the group sorts first
+                lo, hi = bounds[g], bounds[g + 1]
+                if len(strings[lo]) == depth + 1:
+                    node.flag_wordend = True
+                    lo += 1
+                if lo < hi:
+                    jobs.append((lo, hi, depth + 1, node, '_eq'))
+                if glo < g:
+                    ranges.append((glo, g, node, '_lt'))
+                if g + 1 < ghi:
+                    ranges.append((g + 1, ghi, node, '_gt'))
+
+        if start:
+            tree._root.flag_empty = True
+        if balanced:
+            # heights are only needed once inserts have to keep the balance;
+            # nothing can hold the new nodes yet, so no copy is needed
+            tree._persistent = False
+            tree.rebalance()
+            tree._persistent = persistent
+        return tree
 
+    def save(self, path):
+        """ write the TST as a flat, versioned binary image, see
+        compact_tree.CompactTernarySearchTree.save
+        Parameters
+        ----------
+        path : str
+
+        Returns
+        ----------
+
+        """
+        # imported here since compact_tree builds on this module
+        from compact_tree import CompactTernarySearchTree
+        CompactTernarySearchTree.from_tree(self).save(path)
+
+    def freeze(self):
+        """ return a read-only copy of the TST in which equal subtrees, such
+        as the tails of words ending in the same suffix, are stored once,
+        see compact_tree.FrozenTernarySearchTree
+        Parameters
+        ----------
+
+        Returns
+        ----------
+        compact_tree.FrozenTernarySearchTree
+        """
+        from compact_tree import FrozenTernarySearchTree
+        return FrozenTernarySearchTree.from_tree(self)
+
+    @staticmethod
+    def load(path, mmap=True):
+        """ load a TST written by save; with mmap=True the file is mapped
+        read-only and queried in place without creating node objects
+        Parameters
+        ----------
+        path : str
+        mmap : bool
+
+        Returns
+        ----------
+        compact_tree.CompactTernarySearchTree
+        """
+        from compact_tree import CompactTernarySearchTree
+        return CompactTernarySearchTree.load(path, mmap)
 
     def all_strings(self):
         """ return all strings stored in TST
@@ -186,10 +803,100 @@ class TernarySearchTree:
             return self._root._all_strings()
         
     def __len__(self):
-        if self._root is None:
-            return 0
-        else:
-            return len(self._root)
+        return self._size
+
+    def __iter__(self):
+        """ yield the strings in TST in sorted order, lazily """
+        return self._iter_range(None, None)
+
+    def __contains__(self, string):
+        return self.search(string, exact=True)
+
+    def range(self, lo=None, hi=None):
+        """ lazily yield the strings s in TST with lo <= s < hi, in sorted
+        order, skipping the subtrees that lie outside the bounds
+        Parameters
+        ----------
+        lo : str or None, no lower bound if None
+        hi : str or None, no upper bound if None
+
+        Returns
+        ----------
+        Generator
+        """
+        return self._iter_range(lo, hi)
+
+    def keys_from(self, start, limit=None):
+        """ return the first strings in sorted order that are not smaller
+        than start, e.g. one page of a dictionary listing
+        Parameters
+        ----------
+        start : str
+        limit : int or None, at most this many strings
+
+        Returns
+        ----------
+        List
+        """
+        return list(islice(self._iter_range(start, None), limit))
+
+    def _iter_range(self, lo, hi):
+        """ in-order traversal (_lt, own word, _eq, _gt) restricted to
+        lo <= s < hi; a node is tight for a bound while the prefix before it
+        equals the bound's start, and only tight nodes need comparing """
+        root = self._root
+        if root is None or hi == "":
+            return
+        if root.flag_empty and not lo:
+            yield ""
+        # entries: a word to yield, or (node, prefix before the node,
+        # tight for lo, tight for hi)
+        stack = [(root, '', bool(lo), hi is not None)]
+        while stack:
+            entry = stack.pop()
+            if type(entry) is str:
+                yield entry
+                continue
+            node, pf, lo_tight, hi_tight = entry
+            depth, char = len(pf), node._char
+            lt = eq = gt = True
+            own = node.flag_wordend
+            lt_lo = eq_lo = gt_lo = lt_hi = eq_hi = gt_hi = False
+            if lo_tight:
+                bound = lo[depth]
+                if char < bound:
+                    lt = own = eq = False
+                    gt_lo = True
+                elif char == bound:
+                    lt = False
+                    if len(lo) > depth + 1:
+                        own = False
+                        eq_lo = True
+                else:
+                    lt_lo = True
+            if hi_tight:
+                bound = hi[depth]
+                if char > bound:
+                    own = eq = gt = False
+                    lt_hi = True
+                elif char == bound:
+                    gt = False
+                    if len(hi) == depth + 1:
+                        own = eq = False
+                    else:
+                        eq_hi = True
+                else:
+                    gt_hi = True
+
+            # pushed in reverse order
+            if gt and node._gt is not None:
+                stack.append((node._gt, pf, gt_lo, gt_hi))
+            if eq and node._eq is not None:
+                stack.append((node._eq, pf + char, eq_lo, eq_hi))
+            if own:
+                stack.append(pf + char)
+            if lt and node._lt is not None:
+                stack.append((node._lt, pf, lt_lo, lt_hi))
 
     def __repr__(self):
         if self._root is None:
@@ -197,28 +904,506 @@ class TernarySearchTree:
         else:
             return self._root._to_string('')
 
-    def insert(self, string):
+    def insert(self, string, weight=None):
         """ insert a string into TST
         Parameters
         ----------
         string : str
+        weight : number or None, ranks the string in top_k; None keeps the
+                 weight of a stored string and gives new strings weight 0
 
         Returns
         ----------
         List
         """
+        counts = None if self._ops is None else self._count_op('insert')
+        self._insert(string, weight, counts=counts)
+
+    def _insert(self, string, weight, value=_MISSING, counts=None, keep=False):
+        """ insert string with its weight and, if given, its value (TSTMap),
+        adding the walk to counts if they are given; keep=True leaves the
+        value of a stored string as it is. Return the node where string
+        ends (the root for ""), read in the same walk """
+        if self._read_only:
+            raise TypeError('tree is read-only')
+        if string == "" and weight is not None:
+            self._empty_weight = weight
         if self._root is None:
             # if empty string inserted: mark tree as non-empty
             if string == "":
-                self._root = TtreeNode("*")
-                self._root.flag_empty = True
-                return
+                root = TtreeNode("*")
+                root.flag_empty = True
+                if value is not _MISSING:
+                    self._empty_value = value
+                self._size += 1
+                self._root = root
+                if self._cache is not None:
+                    self._cache.invalidate(string)
+                return root
             else:
                 # initiate tree
-                self._root = TtreeNode(string[0])
-        # recursive insertion of whole string
-        self._root._insert(string)
+                root = TtreeNode(string[0])
+        elif self._persistent:
+            # work on private copies of the nodes the insert can change
+            root = self._root._copy_path(string)
+        else:
+            root = self._root
+        # iterative insertion of whole string; unbalanced trees count it
+        # on the way down, balanced ones along the recorded path below
+        if self._balanced or string == "":
+            path, new = root._insert(string, counts)
+            end = path[-1] if path else root
+        else:
+            end, new = root._add(string, 0 if weight is None else weight, counts)
+        if value is not _MISSING and (new or not keep):
+            if string == "":
+                self._empty_value = value
+            else:
+                end._value = value
+                if not new:
+                    # set on the copied path of a persistent tree
+                    self._root = root
+        if not new:
+            if weight is not None and string != "":
+                self._set_weight(root, string, weight)
+                self._root = root
+            return end
+        if string == "":
+            # the weight of "" is kept on the tree
+            self._publish(root, 1, string)
+            return end
+        weight = 0 if weight is None else weight
+        if weight:
+            end._weight = weight
+        if not self._balanced:
+            self._publish(root, 1, string)
+            return end
+
+        # update counters bottom-up; heights only change, and siblings only
+        # need rotating, while a new or grown node hangs off _lt/_gt
+        child, grew = None, False
+        for k in range(len(path) - 1, -1, -1):
+            node = path[k]
+            if child is not None and not (grew and node._eq is not child):
+                grew = not node._count
+                if weight > node._max_weight or (grew and weight != node._max_weight):
+                    node._max_weight = weight
+                node._count += 1
+                child = node
+                continue
+            new, height = not node._count, node._height
+            node._update()
+            top = node._balance(self._persistent)
+            grew = new or top is not node or top._height != height
+            if top is not node:
+                if k == 0:
+                    root = top
+                else:
+                    parent = path[k - 1]
+                    if parent._lt is node:
+                        parent._lt = top
+                    elif parent._gt is node:
+                        parent._gt = top
+                    else:
+                        parent._eq = top
+            child = top
+        self._publish(root, 1, string)
+        return end
+
+    def insert_from_file(self, path, encoding='utf-8', chunk_size=1 << 20):
+        """ insert every line of a text file, stripped as by line.strip(),
+        reading the file in chunks of chunk_size characters so that it is
+        never held in memory as a whole or as a list of lines
+        Parameters
+        ----------
+        path       : str
+        encoding   : str
+        chunk_size : int
+
+        Returns
+        ----------
+        IngestReport(lines, keys, seconds, keys_per_second), where keys is
+        the number of strings that were not stored before; insert skips
+        stored strings itself, so repeated lines are not looked up first
+        """
+        start, size, lines = time.perf_counter(), self._size, 0
+        insert = self.insert
+        with open(path, encoding=encoding) as file:
+            rest = ''
+            while True:
+                chunk = file.read(chunk_size)
+                if not chunk:
+                    break
+                chunk = rest + chunk
+                # the text after the last newline may go on in the next chunk
+                end = chunk.rfind('\n')
+                if end < 0:
+                    rest = chunk
+                    continue
+                rest = chunk[end + 1:]
+                for line in chunk[:end].split('\n'):
+                    lines += 1
+                    insert(line.strip())
+            if rest:
+                lines += 1
+                insert(rest.strip())
+        seconds = time.perf_counter() - start
+        keys = self._size - size
+        return IngestReport(lines, keys, seconds, keys / seconds if seconds else 0.0)
+
+    def _publish(self, root, change, string):
+        """ make root the root of the TST after a write that changed the
+        number of strings by change, and drop the cached results for string;
+        assigning the root is atomic, so readers see the old or the new tree
+        """
+        self._size += change
+        self._root = root
+        if self._cache is not None:
+            self._cache.invalidate(string)
+
+    def _set_weight(self, root, string, weight):
+        """ change the weight of a stored, non-empty string below root and
+        the weight bounds above it """
+        node, path = root, []
+        i, last = 0, len(string) - 1
+        char = string[0]
+        while True:
+            path.append(node)
+            if char < node._char:
+                node = node._lt
+            elif char > node._char:
+                node = node._gt
+            elif i == last:
+                break
+            else:
+                i += 1
+                char = string[i]
+                node = node._eq
+        node._weight = weight
+        for node in reversed(path):
+            node._update()
+
+    def remove(self, string):
+        """ remove a string from TST and unlink the nodes only it used
+        Parameters
+        ----------
+        string : str
+
+        Returns
+        ----------
+
+        """
+        if not self._remove(string):
+            raise KeyError(string)
+
+    def discard(self, string):
+        """ remove a string from TST if it is present
+        Parameters
+        ----------
+        string : str
+
+        Returns
+        ----------
+
+        """
+        self._remove(string)
+
+    def _remove(self, string):
+        """ remove string and prune its path; return False if absent """
+        if self._read_only:
+            raise TypeError('tree is read-only')
+        root = self._root
+        if root is None:
+            return False
+        if self._persistent:
+            root = root._copy_path(string)
+        if string == "":
+            if not root.flag_empty:
+                return False
+            root.flag_empty = False
+            self._empty_weight = 0
+            path = [root]
+        else:
+            # walk down recording every visited node
+            node, path = root, []
+            i, last = 0, len(string) - 1
+            char = string[0]
+            while node is not None:
+                path.append(node)
+                if char < node._char:
+                    node = node._lt
+                elif char > node._char:
+                    node = node._gt
+                elif i == last:
+                    break
+                else:
+                    i += 1
+                    char = string[i]
+                    node = node._eq
+            if node is None or not node.flag_wordend:
+                return False
+            node.flag_wordend = False
+            if node._weight:
+                node._weight = 0
+            if node._value is not None:
+                # a later insert of the string must not revive its value
+                node._value = None
+
+        # bottom-up: unlink nodes that carry no word and have no middle
+        # child, and recompute counters (and balance) of the others
+        for k in range(len(path) - 1, -1, -1):
+            node = path[k]
+            if node.flag_wordend or node.flag_empty or node._eq is not None:
+                node._update()
+                top = node._balance(self._persistent) if self._balanced else node
+            else:
+                top = node._detach(self._balanced, self._persistent)
+            if top is node:
+                continue
+            if k == 0:
+                root = top
+            else:
+                parent = path[k - 1]
+                if parent._lt is node:
+                    parent._lt = top
+                elif parent._gt is node:
+                    parent._gt = top
+                else:
+                    parent._eq = top
+        self._publish(root, -1, string)
+        return True
+
+    def rebalance(self):
+        """ rebuild every group of sibling nodes, i.e. the nodes linked by
+        _lt/_gt below one _eq link, as a height-balanced binary search tree
+        without changing the _eq structure
+        Parameters
+        ----------
+
+        Returns
+        ----------
+
+        """
+        if self._read_only:
+            raise TypeError('tree is read-only')
+        if self._root is None:
+            return
+        # every node may be relinked, so a persistent tree copies them all
+        root = self._root._copy_tree() if self._persistent else self._root
+        empty = root.flag_empty
+        root.flag_empty = False
+        # pairs of (parent node, root of its middle siblings)
+        groups = [(None, root)]
+        while groups:
+            parent, first = groups.pop()
+            nodes = first._siblings()
+            if parent is None and len(nodes) > 1:
+                # drop the "*" sentinel, which only held the empty string flag
+                nodes = [node for node in nodes if node.flag_wordend or node._eq is not None]
+            # the words below each middle child do not change, so the
+            # counters can be computed before the middle children are rebuilt
+            top = _link_balanced(nodes)
+            if parent is None:
+                root = top
+            else:
+                parent._eq = top
+            groups.extend((node, node._eq) for node in nodes if node._eq is not None)
+        root.flag_empty = empty
+        self._root = root
+
+    def union(self, other):
+        """ return a new TST with the strings in this TST or in other
+        Parameters
+        ----------
+        other : TernarySearchTree
+
+        Returns
+        ----------
+        TernarySearchTree
+        """
+        return self._merge(other, lambda mine, theirs: mine or theirs)
+
+    def intersection(self, other):
+        """ return a new TST with the strings in both this TST and other
+        Parameters
+        ----------
+        other : TernarySearchTree
+
+        Returns
+        ----------
+        TernarySearchTree
+        """
+        return self._merge(other, lambda mine, theirs: mine and theirs)
+
+    def difference(self, other):
+        """ return a new TST with the strings in this TST but not in other
+        Parameters
+        ----------
+        other : TernarySearchTree
+
+        Returns
+        ----------
+        TernarySearchTree
+        """
+        return self._merge(other, lambda mine, theirs: mine and not theirs)
+
+    def _merge(self, other, keep):
+        """ build a new TST of the strings for which keep(in self, in other)
+        is true by merging the sorted sibling groups of both trees, one pair
+        of groups per _eq link; every output group is linked as a balanced
+        binary search tree, and weights are taken from self first
+        """
+        tree = TernarySearchTree(self._balanced)
+        # keep(mine, theirs) for a word in self only, in other only, in both
+        only_mine, only_theirs, both = keep(True, False), keep(False, True), keep(True, True)
+        # output groups as (nodes, parent node); a group is listed after
+        # the group of its parent
+        groups = []
+        # jobs: (first sibling in self or None, in other or None, parent node)
+        jobs = [(self._root, other._root, None)]
+        while jobs:
+            a, b, parent = jobs.pop()
+            # most groups are single nodes on the tails of words
+            if a is None:
+                mine = []
+            elif a._lt is None and a._gt is None:
+                mine = [a]
+            else:
+                mine = a._siblings()
+            if b is None:
+                theirs = []
+            elif b._lt is None and b._gt is None:
+                theirs = [b]
+            else:
+                theirs = b._siblings()
+            m, n = len(mine), len(theirs)
+            nodes, i, j = [], 0, 0
+            while i < m or j < n:
+                if j == n or (i < m and mine[i]._char < theirs[j]._char):
+                    x = mine[i]
+                    i += 1
+                    # skip subtrees that cannot hold a kept string
+                    if not only_mine:
+                        continue
+                    node = TtreeNode(x._char)
+                    if x.flag_wordend:
+                        node.flag_wordend = True
+                        node._weight = x._weight
+                    if x._eq is not None:
+                        jobs.append((x._eq, None, node))
+                elif i == m or theirs[j]._char < mine[i]._char:
+                    y = theirs[j]
+                    j += 1
+                    if not only_theirs:
+                        continue
+                    node = TtreeNode(y._char)
+                    if y.flag_wordend:
+                        node.flag_wordend = True
+                        node._weight = y._weight
+                    if y._eq is not None:
+                        jobs.append((None, y._eq, node))
+                else:
+                    x, y = mine[i], theirs[j]
+                    i += 1
+                    j += 1
+                    node = TtreeNode(x._char)
+                    if x.flag_wordend:
+                        if both if y.flag_wordend else only_mine:
+                            node.flag_wordend = True
+                            node._weight = x._weight
+                    elif y.flag_wordend and only_theirs:
+                        node.flag_wordend = True
+                        node._weight = y._weight
+                    x_eq, y_eq = x._eq, y._eq
+                    if (x_eq is not None and (only_mine or y_eq is not None)) or \
+                            (y_eq is not None and only_theirs):
+                        jobs.append((x_eq, y_eq, node))
+                nodes.append(node)
+            groups.append((nodes, parent))
+
+        # link the groups bottom-up, so that every middle child is complete
+        # before its parent's counters are computed, and drop the nodes
+        # that lead to no string
+        for nodes, parent in reversed(groups):
+            nodes = [node for node in nodes if node.flag_wordend or node._eq is not None]
+            if len(nodes) == 1:
+                top = nodes[0]
+                top._update()
+            else:
+                top = _link_balanced(nodes) if nodes else None
+            if parent is None:
+                tree._root = top
+            else:
+                parent._eq = top
+
+        mine = self._root is not None and self._root.flag_empty
+        theirs = other._root is not None and other._root.flag_empty
+        if keep(mine, theirs):
+            if tree._root is None:
+                tree._root = TtreeNode("*")
+            tree._root.flag_empty = True
+            tree._empty_weight = self._empty_weight if mine else other._empty_weight
+        tree._size = len(tree._root) if tree._root is not None else 0
+        return tree
+
+    def issubset(self, other):
+        """ test whether every string in this TST is in other, walking the
+        sorted sibling groups of both trees side by side
+        Parameters
+        ----------
+        other : TernarySearchTree
 
+        Returns
+        ----------
+        Boolean
+        """
+        if self._root is None:
+            return True
+        if other._root is None:
+            return self._size == 0
+        if self._root.flag_empty and not other._root.flag_empty:
+            return False
+        jobs = [(self._root, other._root)]
+        while jobs:
+            a, b = jobs.pop()
+            theirs = iter(b._siblings() if b is not None else [])
+            y = next(theirs, None)
+            for x in a._siblings():
+                while y is not None and y._char < x._char:
+                    y = next(theirs, None)
+                # strings that end in x or below its middle child
+                own = x.flag_wordend + (x._eq._count if x._eq is not None else 0)
+                if not own:
+                    continue
+                if y is None or y._char != x._char or (x.flag_wordend and not y.flag_wordend):
+                    return False
+                if x._eq is not None:
+                    jobs.append((x._eq, y._eq))
+        return True
+
+    def snapshot(self):
+        """ return a read-only TST holding the strings stored right now
+
+        For a persistent tree this takes constant time: writes never change
+        a published node, so the snapshot shares all nodes with the tree
+        and can be searched from other threads without a lock while writes
+        go on. Any other tree is copied node by node.
+        Parameters
+        ----------
+
+        Returns
+        ----------
+        TernarySearchTree
+        """
+        # read the root once, the size follows from it
+        root = self._root
+        snapshot = type(self)(self._balanced)
+        if root is not None:
+            snapshot._root = root if self._persistent else root._copy_tree()
+            snapshot._size = len(root)
+        snapshot._empty_weight = self._empty_weight
+        snapshot._read_only = True
+        return snapshot
 
     def prefix_search(self, node: TtreeNode, prefix):
         """ helper function for searching all words with given prefix
@@ -231,17 +1416,252 @@ class TernarySearchTree:
         ----------
         List
         """
-        if node._eq:
-            # keep recursing into middle children as long as there is one
-            # return all words that contain the prefix
-            wordlist = node._eq._all_strings(prefix)
-        elif node.flag_wordend:
-            wordlist = [prefix]
+        return list(self._iter_completions(node, prefix))
+
+    def _iter_completions(self, node, prefix):
+        """ generator over prefix itself if it is a word ending in node,
+        followed by all words below node's middle child """
+        if node.flag_wordend:
+            yield prefix
+        if node._eq is not None:
+            yield from node._eq._iter_strings(prefix)
+
+    def iter_prefix(self, prefix, limit=None):
+        """ lazily yield the strings in TST that start with prefix
+        Parameters
+        ----------
+        prefix  : str
+        limit   : int or None, maximum number of strings to yield
+
+        Returns
+        ----------
+        Iterator over str
+        """
+        if self._root is None:
+            return iter(())
+        if prefix == "":
+            completions = self._root._iter_strings()
         else:
-            wordlist = []
-        return wordlist
-        
+            node = self._root._psearch(prefix)
+            if node is None:
+                return iter(())
+            completions = self._iter_completions(node, prefix)
+        if limit is None:
+            return completions
+        # stop the traversal once limit strings were produced
+        return islice(completions, limit)
+
+
+
+    def completions(self, prefix, limit=None):
+        """ return the strings in TST that start with prefix, at most limit
+        of them; results are cached when the tree has a cache
+        Parameters
+        ----------
+        prefix  : str
+        limit   : int or None
+
+        Returns
+        ----------
+        List
+        """
+        cache = self._cache
+        if cache is None:
+            return list(self.iter_prefix(prefix, limit))
+        key = (prefix, 'completions', limit)
+        words = cache.get(key)
+        if words is _MISSING:
+            words = tuple(self.iter_prefix(prefix, limit))
+            cache.put(key, words)
+        return list(words)
+
+    def fuzzy_search(self, word, max_distance=1, limit=None):
+        """ find the strings in TST within Levenshtein distance max_distance
+        of word
+
+        The tree is walked with one row of the edit distance table per node
+        on the current path; a branch is pruned as soon as every entry of
+        its row exceeds max_distance.
+        Parameters
+        ----------
+        word         : str
+        max_distance : int
+        limit        : int or None, return only the limit closest strings
 
+        Returns
+        ----------
+        List of (str, int) pairs sorted by distance, then string
+        """
+        matches = []
+        root = self._root
+        if root is None:
+            return matches
+        columns = len(word) + 1
+        first_row = list(range(columns))
+        if root.flag_empty and len(word) <= max_distance:
+            matches.append(("", len(word)))
+
+        # triples of (node, prefix before its character, row of that prefix)
+        stack = [(root, "", first_row)]
+        while stack:
+            node, pf, above = stack.pop()
+            # siblings continue from the same prefix and row
+            if node._lt is not None:
+                stack.append((node._lt, pf, above))
+            if node._gt is not None:
+                stack.append((node._gt, pf, above))
+
+            char = node._char
+            row = [above[0] + 1]
+            for j in range(1, columns):
+                row.append(min(row[j - 1] + 1, above[j] + 1,
+                               above[j - 1] + (word[j - 1] != char)))
+            if node.flag_wordend and row[-1] <= max_distance:
+                matches.append((pf + char, row[-1]))
+            if node._eq is not None and min(row) <= max_distance:
+                stack.append((node._eq, pf + char, row))
+
+        matches.sort(key=lambda match: (match[1], match[0]))
+        return matches if limit is None else matches[:limit]
+
+    def match(self, pattern):
+        """ lazily yield the strings in TST matching pattern, where ? matches
+        any single character and * matches any sequence of characters
+
+        Fixed characters follow a single path, ? visits the siblings of one
+        level and only * explores whole subtrees, so the cost grows with the
+        number of matches rather than with the size of the tree. A leading *
+        prunes nothing, so those patterns filter all strings with a regular
+        expression instead.
+        Parameters
+        ----------
+        pattern : str
+
+        Returns
+        ----------
+        Iterator over str, in no particular order
+        """
+        # a run of stars matches the same as a single star
+        chars = []
+        for char in pattern:
+            if not (char == '*' and chars and chars[-1] == '*'):
+                chars.append(char)
+        pattern = ''.join(chars)
+        end = len(pattern)
+        # only_stars[i]: the rest of the pattern from i also matches ""
+        only_stars = [False] * end + [True]
+        for i in range(end - 1, -1, -1):
+            only_stars[i] = pattern[i] == '*' and only_stars[i + 1]
+
+        root = self._root
+        if root is None:
+            return
+        if pattern.startswith('*'):
+            regex = re.compile(''.join('.*' if char == '*' else '.' if char == '?'
+                                       else re.escape(char) for char in pattern), re.DOTALL)
+            yield from (word for word in root._iter_strings() if regex.fullmatch(word))
+            return
+        if root.flag_empty and only_stars[0]:
+            yield ""
+        if end == 0:
+            return
+
+        # triples of (first sibling, pattern position, prefix before it);
+        # with several stars the same state can be reached more than once
+        stack, seen, found = [(root, 0, "")], set(), set()
+        several_stars = pattern.count('*') > 1
+        while stack:
+            first, i, pf = stack.pop()
+            if several_stars:
+                if (id(first), i) in seen:
+                    continue
+                seen.add((id(first), i))
+
+            wildcard = pattern[i]
+            if wildcard == '*':
+                # match nothing with the star, or one character and keep it
+                if i + 1 < end:
+                    stack.append((first, i + 1, pf))
+                candidates, after = first._siblings(), i
+            elif wildcard == '?':
+                candidates, after = first._siblings(), i + 1
+            else:
+                node = first
+                while node is not None and node._char != wildcard:
+                    node = node._lt if wildcard < node._char else node._gt
+                candidates, after = [] if node is None else [node], i + 1
+
+            for node in reversed(candidates):
+                word = pf + node._char
+                if node.flag_wordend and only_stars[after] and id(node) not in found:
+                    found.add(id(node))
+                    yield word
+                if node._eq is not None and after < end:
+                    stack.append((node._eq, after, word))
+
+    def top_k(self, prefix, k):
+        """ return the k heaviest strings in TST that start with prefix
+
+        Best-first search: subtrees wait in a heap ordered by the largest
+        weight stored below them, so only subtrees that can still hold one
+        of the k heaviest strings are expanded.
+        Parameters
+        ----------
+        prefix : str
+        k      : int
+
+        Returns
+        ----------
+        List of (str, weight) pairs, heaviest first
+        """
+        heaviest = []
+        if self._root is None or k <= 0:
+            return heaviest
+        # entries: (-weight, tie breaker, word or None, node, prefix before node)
+        heap, order = [], count()
+        if prefix == "":
+            if self._root.flag_empty:
+                heappush(heap, (-self._empty_weight, next(order), "", None, None))
+            start, pf = self._root, ""
+        else:
+            node = self._root._psearch(prefix)
+            if node is None:
+                return heaviest
+            if node.flag_wordend:
+                heappush(heap, (-node._weight, next(order), prefix, None, None))
+            start, pf = node._eq, prefix
+        if start is not None and start._max_weight > _NO_WEIGHT:
+            heappush(heap, (-start._max_weight, next(order), None, start, pf))
+
+        while heap:
+            weight, _, word, node, pf = heappop(heap)
+            if word is not None:
+                heaviest.append((word, -weight))
+                if len(heaviest) == k:
+                    break
+                continue
+            if node.flag_wordend:
+                heappush(heap, (-node._weight, next(order), pf + node._char, None, None))
+            for child, child_pf in ((node._lt, pf), (node._gt, pf), (node._eq, pf + node._char)):
+                if child is not None and child._max_weight > _NO_WEIGHT:
+                    heappush(heap, (-child._max_weight, next(order), None, child, child_pf))
+        return heaviest
+
+    def cache_info(self):
+        """ return the counters of the query cache
+        Parameters
+        ----------
+
+        Returns
+        ----------
+        CacheInfo(hits, misses, evictions, maxsize, currsize) or None
+        """
+        return None if self._cache is None else self._cache.info()
+
+    def cache_clear(self):
+        """ drop all cached query results """
+        if self._cache is not None:
+            self._cache.clear()
 
     def search(self, prefix, exact=False):
         """ method to search for words or prefixes
@@ -254,6 +1674,18 @@ class TernarySearchTree:
         ----------
         Boolean
         """
+        cache = self._cache
+        if cache is None:
+            return self._search(prefix, exact)
+        key = (prefix, 'exact' if exact else 'prefix', None)
+        found = cache.get(key)
+        if found is _MISSING:
+            found = self._search(prefix, exact)
+            cache.put(key, found)
+        return found
+
+    def _search(self, prefix, exact):
+        counts = None if self._ops is None else self._count_op('search')
         # False if TST empty
         if self._root is None:
             return False
@@ -264,7 +1696,7 @@ class TernarySearchTree:
                 return True
         
         # traverse tree to search prefix
-        node = self._root._psearch(prefix)
+        node = self._root._psearch(prefix, counts)
         # true if the empty prefix was inserted
         if prefix == "" and not exact:
             return True
@@ -282,9 +1714,467 @@ class TernarySearchTree:
 
         ## Prefix string search ##
         elif not exact:
-            # search for all words containing the prefix
-            wordlist = self.prefix_search(node, prefix)
-            if wordlist:
-                return True
-            return False
+            # every middle child leads to at least one word,
+            # so no completions have to be listed
+            return node.flag_wordend or node._eq is not None
+
+
+    def instrument(self, enabled=True):
+        """ start counting the nodes visited and the characters compared
+        by every insert and every search that walks the tree (cache hits do
+        not), from zero; enabled=False stops counting. The walks count
+        themselves, so an insert is counted before any rotation. While off,
+        the cost is one attribute test per call.
+        Parameters
+        ----------
+        enabled : bool
+
+        Returns
+        ----------
+
+        """
+        self._ops = {} if enabled else None
+
+    def op_counts(self):
+        """ return the counters recorded since instrument() was called
+        Parameters
+        ----------
+
+        Returns
+        ----------
+        dict of operation name to OpCounts(calls, visits, comparisons,
+        max_visits), or None if counting is off
+        """
+        if self._ops is None:
+            return None
+        return {name: OpCounts(*counts) for name, counts in self._ops.items()}
+
+    def _count_op(self, name):
+        """ count a call of name and return its counters, which the walk of
+        the call (TtreeNode._insert or TtreeNode._psearch) adds to """
+        counts = self._ops.get(name)
+        if counts is None:
+            counts = self._ops[name] = [0, 0, 0, 0]
+        counts[0] += 1
+        return counts
+
+    def stats(self):
+        """ measure the shape of the TST; the depth of a string is the number
+        of nodes an exact search for it visits, and the chain length of a
+        group of siblings (the nodes linked by _lt/_gt below one _eq link) is
+        the height of their binary search tree
+        Parameters
+        ----------
+
+        Returns
+        ----------
+        TreeStats(nodes, keys, max_depth, mean_depth, depth_histogram,
+        chain_lengths, nbytes), with the histograms as dicts of depth or
+        chain length to the number of strings or groups
+        """
+        depths, chains = {}, {}
+        nodes = nbytes = 0
+        # (node, depth, height within its group of siblings, group)
+        stack = [(self._root, 1, 1, 0)] if self._root is not None else []
+        heights = [0]
+        while stack:
+            node, depth, height, group = stack.pop()
+            nodes += 1
+            nbytes += sys.getsizeof(node) + sys.getsizeof(node.__dict__)
+            if height > heights[group]:
+                heights[group] = height
+            if node.flag_wordend:
+                depths[depth] = depths.get(depth, 0) + 1
+            if node._lt is not None:
+                stack.append((node._lt, depth + 1, height + 1, group))
+            if node._gt is not None:
+                stack.append((node._gt, depth + 1, height + 1, group))
+            if node._eq is not None:
+                heights.append(0)
+                stack.append((node._eq, depth + 1, 1, len(heights) - 1))
+        if nodes:
+            for height in heights:
+                chains[height] = chains.get(height, 0) + 1
+
+        walked = sum(depths.values())
+        return TreeStats(
+            nodes=nodes,
+            keys=self._size,
+            max_depth=max(depths, default=0),
+            mean_depth=sum(depth * n for depth, n in depths.items()) / walked if walked else 0.0,
+            depth_histogram=dict(sorted(depths.items())),
+            chain_lengths=dict(sorted(chains.items())),
+            nbytes=nbytes,
+        )
 
+    def search_many(self, keys, exact=False, as_array=False):
+        """ search for many words or prefixes at once
+
+        Repeated keys are looked up once and the distinct keys are visited in
+        sorted order, so the path shared with the previous key is walked
+        only once.
+        Parameters
+        ----------
+        keys     : iterable of str
+        exact    : bool
+        as_array : bool, return a numpy bool array instead of a list
+
+        Returns
+        ----------
+        List of Boolean (or numpy array) in the order of keys
+        """
+        keys = list(keys)
+        found = dict.fromkeys(keys, False)
+        root = self._root
+        if root is not None:
+            # path: nodes matching the leading characters of the previous key
+            path, previous = [], ""
+            for key in sorted(found):
+                length = len(key)
+                if length == 0:
+                    found[key] = root.flag_empty or not exact
+                    continue
+
+                # keep the nodes of the prefix shared with the previous key
+                shared, limit = 0, min(len(path), length)
+                while shared < limit and key[shared] == previous[shared]:
+                    shared += 1
+                del path[shared:]
+                previous = key
+
+                node = path[-1]._eq if shared else root
+                i = shared
+                while node is not None:
+                    char = key[i]
+                    if char < node._char:
+                        node = node._lt
+                    elif char > node._char:
+                        node = node._gt
+                    else:
+                        path.append(node)
+                        i += 1
+                        if i == length:
+                            found[key] = node.flag_wordend or (not exact and node._eq is not None)
+                            break
+                        node = node._eq
+
+        results = [found[key] for key in keys]
+        if as_array:
+            if numpy is None:
+                raise ImportError('as_array=True requires numpy')
+            return numpy.array(results, dtype=bool)
+        return results
+
+    def contains_many(self, keys, as_array=False):
+        """ exact search for many words at once, see search_many
+        Parameters
+        ----------
+        keys     : iterable of str
+        as_array : bool, return a numpy bool array instead of a list
+
+        Returns
+        ----------
+        List of Boolean (or numpy array) in the order of keys
+        """
+        return self.search_many(keys, exact=True, as_array=as_array)
+
+    def _prefix_ends(self, text, start):
+        """ generator over the end positions in text of the stored strings
+        that start at position start, shortest first, in one walk down the
+        tree without slicing text """
+        node = self._root
+        if node is None:
+            return
+        if node.flag_empty:
+            yield start
+        i, end = start, len(text)
+        while node is not None and i < end:
+            char = text[i]
+            if char < node._char:
+                node = node._lt
+            elif char > node._char:
+                node = node._gt
+            else:
+                i += 1
+                if node.flag_wordend:
+                    yield i
+                node = node._eq
+
+    def longest_prefix_of(self, text, start=0):
+        """ return the longest string in TST that text continues at
+        position start, e.g. for greedy tokenisation
+        Parameters
+        ----------
+        text  : str
+        start : int, position in text where the match begins
+
+        Returns
+        ----------
+        str, or None if no stored string matches
+        """
+        longest = None
+        for longest in self._prefix_ends(text, start):
+            pass
+        return None if longest is None else text[start:longest]
+
+    def prefixes_of(self, text, start=0):
+        """ return all strings in TST that text continues at position
+        start, shortest first
+        Parameters
+        ----------
+        text  : str
+        start : int, position in text where the matches begin
+
+        Returns
+        ----------
+        List
+        """
+        return [text[start:end] for end in self._prefix_ends(text, start)]
+
+    def count_prefix(self, prefix):
+        """ count the strings in TST that start with prefix
+        Parameters
+        ----------
+        prefix  : str
+
+        Returns
+        ----------
+        int
+        """
+        if prefix == "":
+            return self._size
+        if self._root is None:
+            return 0
+        node = self._root._psearch(prefix)
+        if node is None:
+            return 0
+        return node.flag_wordend + (node._eq._count if node._eq else 0)
+
+    def rank(self, string):
+        """ count the strings in TST that are smaller than string
+        Parameters
+        ----------
+        string  : str
+
+        Returns
+        ----------
+        int
+        """
+        if self._root is None or string == "":
+            return 0
+        # "" is smaller than every other string
+        rank = int(self._root.flag_empty)
+        node = self._root
+        i, last = 0, len(string) - 1
+        char = string[0]
+        while node is not None:
+            if char < node._char:
+                node = node._lt
+            elif char > node._char:
+                # left subtree, the node's own word and its middle subtree are smaller
+                rank += (node._lt._count if node._lt else 0) + node.flag_wordend
+                rank += node._eq._count if node._eq else 0
+                node = node._gt
+            else:  # char == node._char
+                rank += node._lt._count if node._lt else 0
+                if i == last:
+                    break
+                # the node's own word is a proper prefix of string
+                rank += node.flag_wordend
+                i += 1
+                char = string[i]
+                node = node._eq
+        return rank
+
+    def select(self, index):
+        """ return the string at position index in sorted order
+        Parameters
+        ----------
+        index  : int
+
+        Returns
+        ----------
+        str
+        """
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError('TST index out of range')
+
+        node = self._root
+        if node.flag_empty:
+            if index == 0:
+                return ""
+            index -= 1
+        prefix = []
+        while True:
+            lt_count = node._lt._count if node._lt else 0
+            if index < lt_count:
+                node = node._lt
+                continue
+            index -= lt_count
+            if node.flag_wordend:
+                if index == 0:
+                    prefix.append(node._char)
+                    return ''.join(prefix)
+                index -= 1
+            eq_count = node._eq._count if node._eq else 0
+            if index < eq_count:
+                prefix.append(node._char)
+                node = node._eq
+            else:
+                index -= eq_count
+                node = node._gt
+
+
+class TSTMap(TernarySearchTree):
+    """A Ternary Search Tree that maps every string to a value, stored on
+    the node where the string ends, so that no parallel dict is needed
+        Methods
+    ----------
+    __getitem__    : return the value of a string, KeyError if missing
+    get            : return the value of a string or a default
+    __setitem__    : insert a string with its value, or replace its value
+    setdefault     : return the value of a string, inserting a default first
+    __delitem__    : remove a string and its value, KeyError if missing
+    items          : lazily yield sorted (string, value) pairs for a prefix
+    (all methods of TernarySearchTree; strings inserted by insert() have
+    the value None)
+    """
+
+    def __init__(self, balanced=False, cache_size=None, persistent=False):
+        super().__init__(balanced, cache_size, persistent)
+        self._empty_value = None  # value of "", which has no node of its own
+
+    def _node(self, key):
+        """ the node where key ends, found in one walk, or None; the tree
+        root stands for "" """
+        root = self._root
+        if root is None:
+            return None
+        if key == "":
+            return root if root.flag_empty else None
+        node = root._psearch(key)
+        return node if node is not None and node.flag_wordend else None
+
+    def __getitem__(self, key):
+        """ return the value of key
+        Parameters
+        ----------
+        key : str
+
+        Returns
+        ----------
+        value stored with key
+        """
+        node = self._node(key)
+        if node is None:
+            raise KeyError(key)
+        return self._empty_value if key == "" else node._value
+
+    def get(self, key, default=None):
+        """ return the value of key, or default if key is missing
+        Parameters
+        ----------
+        key     : str
+        default : any
+
+        Returns
+        ----------
+        value stored with key, or default
+        """
+        node = self._node(key)
+        if node is None:
+            return default
+        return self._empty_value if key == "" else node._value
+
+    def __setitem__(self, key, value):
+        """ insert key with value, or replace the value of a stored key
+        Parameters
+        ----------
+        key   : str
+        value : any
+
+        Returns
+        ----------
+
+        """
+        counts = None if self._ops is None else self._count_op('insert')
+        self._insert(key, None, value, counts)
+
+    def setdefault(self, key, default=None):
+        """ return the value of key, inserting key with default first if it
+        is missing
+        Parameters
+        ----------
+        key     : str
+        default : any
+
+        Returns
+        ----------
+        value stored with key
+        """
+        counts = None if self._ops is None else self._count_op('insert')
+        node = self._insert(key, None, default, counts, keep=True)
+        return self._empty_value if key == "" else node._value
+
+    def __delitem__(self, key):
+        self.remove(key)
+
+    def _remove(self, string):
+        removed = super()._remove(string)
+        if removed and string == "":
+            self._empty_value = None
+        return removed
+
+    def snapshot(self):
+        snapshot = super().snapshot()
+        snapshot._empty_value = self._empty_value
+        return snapshot
+
+    def items(self, prefix=""):
+        """ lazily yield the (string, value) pairs of the strings that start
+        with prefix, in sorted order, reading each value from the node where
+        its string ends
+        Parameters
+        ----------
+        prefix : str
+
+        Returns
+        ----------
+        Generator
+        """
+        root = self._root
+        if root is None:
+            return
+        if prefix == "":
+            if root.flag_empty:
+                yield "", self._empty_value
+            first, pf = root, ""
+        else:
+            node = root._psearch(prefix)
+            if node is None:
+                return
+            if node.flag_wordend:
+                yield prefix, node._value
+            first, pf = node._eq, prefix
+        if first is None:
+            return
+        # entries: a node whose (word, value) is due, or (node, prefix
+        # before the node) for a subtree still to visit
+        stack = [(first, pf)]
+        while stack:
+            node, pf = stack.pop()
+            if node is None:
+                # pf holds a (word, value) pair
+                yield pf
+                continue
+            word = pf + node._char
+            if node._gt is not None:
+                stack.append((node._gt, pf))
+            if node._eq is not None:
+                stack.append((node._eq, word))
+            if node.flag_wordend:
+                stack.append((None, (word, node._value)))
+            if node._lt is not None:
+                stack.append((node._lt, pf))
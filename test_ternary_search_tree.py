@@ -1,5 +1,13 @@
+import asyncio
+import json
+import random
 import pytest
-from ternary_search_tree import TernarySearchTree
+from ternary_search_tree import TernarySearchTree, TSTMap
+from compact_tree import CompactTernarySearchTree
+from compressed_tree import CompressedTernarySearchTree
+from sharded_tree import ShardedTernarySearchTree
+from tree_server import TreeServer
+from benchmarks import suite
 
 # _____________ Fixing _____________
 
@@ -87,4 +95,910 @@ def test_insert_and_search_cases(insert_words, search_word, exact, expected):
     else:
         result = tree.search(search_word, exact=exact)
 
-    assert result is expected
\ No newline at end of file
+    assert result is expected
+
+# _____________ Iterative Engine Testing _____________
+
+def test_keys_longer_than_recursion_limit():
+    import sys
+    word = 'ab' * sys.getrecursionlimit()
+    tree = TernarySearchTree()
+    tree.insert(word)
+    assert tree.search(word, exact=True), 'long word not found'
+    assert tree.search(word[:-1]), 'prefix of long word not found'
+    assert not tree.search(word[:-1], exact=True), 'prefix of long word found as exact match'
+
+def test_sorted_insertion_builds_searchable_tree(inserted_words):
+    tree = TernarySearchTree()
+    for word in sorted(inserted_words):
+        tree.insert(word)
+    for word in inserted_words:
+        assert tree.search(word, exact=True), f'{word} not found'
+
+
+# _____________ Compact Tree Testing _____________
+
+@pytest.fixture
+def compact_tst(inserted_words):
+    tree = CompactTernarySearchTree()
+    for word in inserted_words:
+        tree.insert(word)
+    return tree
+
+def test_compact_tree_matches_inserted_words(compact_tst, unique_inserted_words, not_inserted_words):
+    assert len(compact_tst) == len(unique_inserted_words)
+    assert sorted(compact_tst.all_strings()) == sorted(unique_inserted_words)
+    for word in unique_inserted_words:
+        assert compact_tst.search(word, exact=True), f'{word} not found'
+        assert compact_tst.search(word[:1]), f'{word[:1]} not found'
+    for word in not_inserted_words:
+        assert not compact_tst.search(word), f'{word} should not be found'
+
+def test_compact_tree_from_tree(tst, unique_inserted_words):
+    tst.insert('')
+    compact = CompactTernarySearchTree.from_tree(tst)
+    assert len(compact) == len(unique_inserted_words) + 1
+    assert sorted(compact.all_strings()) == sorted(unique_inserted_words | {''})
+    assert compact.search('', exact=True), 'empty string not copied'
+    assert repr(compact) == repr(tst)
+
+@pytest.mark.parametrize("insert_words, search_word, exact, expected", [
+    (["", "b"], "", True, True),
+    (["b"], "", True, False),
+    (["b"], "", False, True),
+    (["abc", "cat", "a", "", "b"], "a", True, True),
+    (["abc", "cat", "a", "", "b"], "ac", False, False),
+])
+def test_compact_insert_and_search_cases(insert_words, search_word, exact, expected):
+    tree = CompactTernarySearchTree()
+    for word in insert_words:
+        tree.insert(word)
+    assert tree.search(search_word, exact=exact) is expected
+
+
+# _____________ Counter Testing _____________
+
+def test_len_counts_empty_string_and_duplicates_once():
+    tree = TernarySearchTree()
+    for word in ['', 'cat', 'car', 'cat', '', 'c']:
+        tree.insert(word)
+    assert len(tree) == 4, f'{len(tree)} in tree, expected 4'
+
+def test_count_prefix_matches_prefix_filter(tst, unique_inserted_words):
+    for prefix in ['', 'c', 'co', 'comb', 'combination', 'combinations', 'x']:
+        expected = sum(word.startswith(prefix) for word in unique_inserted_words)
+        assert tst.count_prefix(prefix) == expected, f'wrong count for {prefix}'
+
+def test_rank_and_select_follow_sorted_order(tst, unique_inserted_words, not_inserted_words):
+    tst.insert('')
+    ordered = sorted(unique_inserted_words | {''})
+    for index, word in enumerate(ordered):
+        assert tst.select(index) == word, f'select({index}) != {word}'
+        assert tst.rank(word) == index, f'rank({word}) != {index}'
+    for word in not_inserted_words:
+        assert tst.rank(word) == sum(other < word for other in ordered)
+    assert tst.select(-1) == ordered[-1]
+    with pytest.raises(IndexError):
+        tst.select(len(ordered))
+
+
+# _____________ Prefix Iteration Testing _____________
+
+@pytest.mark.parametrize("prefix", ['', 'c', 'comb', 'combination', 'x'])
+def test_iter_prefix_matches_prefix_filter(tst, unique_inserted_words, prefix):
+    expected = sorted(word for word in unique_inserted_words if word.startswith(prefix))
+    assert sorted(tst.iter_prefix(prefix)) == expected, f'wrong completions for {prefix}'
+
+def test_iter_prefix_limit(tst):
+    assert len(list(tst.iter_prefix('c', limit=3))) == 3
+    assert list(tst.iter_prefix('c', limit=0)) == []
+    assert len(list(tst.iter_prefix('combination', limit=10))) == 2
+
+def test_all_strings_on_deep_tree():
+    import sys
+    words = ['a' * length for length in range(1, sys.getrecursionlimit() + 10)]
+    tree = TernarySearchTree()
+    for word in words:
+        tree.insert(word)
+    assert sorted(tree.all_strings()) == words
+
+
+# _____________ Bulk Loading Testing _____________
+
+def test_from_iterable_matches_inserted_words(inserted_words, unique_inserted_words, not_inserted_words):
+    tree = TernarySearchTree.from_iterable(inserted_words + [''])
+    assert len(tree) == len(unique_inserted_words) + 1
+    assert sorted(tree.all_strings()) == sorted(unique_inserted_words | {''})
+    for word in unique_inserted_words:
+        assert tree.search(word, exact=True), f'{word} not found'
+    for word in not_inserted_words:
+        assert not tree.search(word), f'{word} should not be found'
+    assert tree.count_prefix('comb') == sum(w.startswith('comb') for w in unique_inserted_words)
+
+@pytest.mark.parametrize("words", [[], [''], ['a'], ['', 'b', 'ba'], ['\U0010ffff'],
+                                   ['a', 'a\U0010ffff', 'a\U0010ffffb', '\U0010ffff', '\U0010ffff\U0010ffff']])
+def test_from_sorted_small_inputs(words):
+    tree = TernarySearchTree.from_sorted(words)
+    assert len(tree) == len(words)
+    assert sorted(tree.all_strings()) == words
+    assert tree.search('', exact=True) is ('' in words)
+
+def test_from_sorted_rejects_unsorted_input():
+    with pytest.raises(ValueError):
+        TernarySearchTree.from_sorted(['b', 'a'])
+    with pytest.raises(ValueError):
+        TernarySearchTree.from_sorted(['a', 'a'])
+
+
+# _____________ Balancing Testing _____________
+
+def max_search_depth(tree, words):
+    # largest number of nodes visited to find one of the words
+    depths = []
+    for word in words:
+        node, i, depth = tree._root, 0, 1
+        while not (word[i] == node._char and i == len(word) - 1):
+            if word[i] < node._char:
+                node = node._lt
+            elif word[i] > node._char:
+                node = node._gt
+            else:
+                node, i = node._eq, i + 1
+            depth += 1
+        depths.append(depth)
+    return max(depths)
+
+@pytest.fixture
+def sorted_words():
+    return [f'{i:04d}' for i in range(1000)]
+
+def test_balanced_insert_bounds_depth_for_sorted_input(sorted_words):
+    plain, balanced = TernarySearchTree(), TernarySearchTree(balanced=True)
+    for word in [''] + sorted_words:
+        plain.insert(word)
+        balanced.insert(word)
+    assert max_search_depth(plain, sorted_words) > 3 * 10
+    assert max_search_depth(balanced, sorted_words) <= 4 * 4
+    assert sorted(balanced.all_strings()) == sorted(plain.all_strings())
+    assert balanced.search('', exact=True), 'empty string lost by rotations'
+    assert [balanced.select(i) for i in range(len(balanced))] == [''] + sorted_words
+
+def assert_avl(tree):
+    # every stored height is the real one and no sibling subtree is skewed
+    def height(node):
+        if node is None:
+            return 0
+        lt, gt = height(node._lt), height(node._gt)
+        height(node._eq)
+        assert node._height == 1 + max(lt, gt), f'stale height at {node!r}'
+        assert abs(lt - gt) <= 1, f'skewed at {node!r}'
+        return node._height
+    height(tree._root)
+
+def test_balanced_insert_keeps_avl_heights_after_empty_string():
+    rng = random.Random(0)
+    for words in [['', 'b', 'gb', 'hhff']] + [
+            [''] + [''.join(rng.choices('abcdefgh', k=rng.randint(1, 4))) for _ in range(30)]
+            for _ in range(300)]:
+        tree = TernarySearchTree(balanced=True)
+        for word in words:
+            tree.insert(word)
+            assert_avl(tree)
+        assert sorted(tree.all_strings()) == sorted(set(words))
+
+@pytest.mark.parametrize("rebalance", [False, True])
+def test_rotations_drop_empty_string_sentinel(rebalance):
+    tree = TernarySearchTree(balanced=not rebalance)
+    for word in ['', 'a', 'b', 'c']:
+        tree.insert(word)
+    if rebalance:
+        tree.rebalance()
+    assert count_nodes(tree) == 3, 'sentinel node left in the tree'
+    assert not tree.search('*') and tree.search('', exact=True)
+    for word in ['', 'a', 'b', 'c']:
+        tree.remove(word)
+    assert tree._root is None and not tree.search('') and tree.search_many(['']) == [False]
+
+def test_rebalance_keeps_strings_and_counters(sorted_words):
+    tree = TernarySearchTree()
+    for word in [''] + sorted_words:
+        tree.insert(word)
+    tree.rebalance()
+    assert max_search_depth(tree, sorted_words) <= 4 * 4
+    assert len(tree) == len(sorted_words) + 1
+    assert sorted(tree.all_strings()) == [''] + sorted_words
+    assert tree.search('', exact=True), 'empty string lost by rebalance'
+    assert tree.count_prefix('01') == 100
+    assert tree.rank('0500') == 501
+
+
+# _____________ Serialization Testing _____________
+
+@pytest.mark.parametrize("use_mmap", [True, False])
+def test_save_and_load_round_trip(tst, unique_inserted_words, not_inserted_words, tmp_path, use_mmap):
+    tst.insert('')
+    path = tmp_path / 'tree.tst'
+    tst.save(path)
+    loaded = TernarySearchTree.load(path, mmap=use_mmap)
+    assert len(loaded) == len(unique_inserted_words) + 1
+    assert sorted(loaded.all_strings()) == sorted(unique_inserted_words | {''})
+    assert loaded.search('', exact=True)
+    for word in unique_inserted_words:
+        assert loaded.search(word, exact=True), f'{word} not found'
+        assert loaded.search(word[:2]), f'{word[:2]} not found'
+    for word in not_inserted_words:
+        assert not loaded.search(word), f'{word} should not be found'
+
+def test_mapped_tree_is_read_only(tst, tmp_path):
+    path = tmp_path / 'tree.tst'
+    tst.save(path)
+    with pytest.raises(TypeError):
+        TernarySearchTree.load(path).insert('new')
+    copied = TernarySearchTree.load(path, mmap=False)
+    copied.insert('new')
+    assert copied.search('new', exact=True)
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / 'words.txt'
+    path.write_text('not a tree\n' * 10)
+    with pytest.raises(ValueError, match='not a ternary search tree'):
+        TernarySearchTree.load(path)
+
+def test_load_reports_unsupported_version(tst, tmp_path):
+    path = tmp_path / 'words.tst'
+    tst.save(path)
+    image = bytearray(path.read_bytes())
+    # a future version with a different layout after the header
+    image[4:8] = (2).to_bytes(4, 'little')
+    path.write_bytes(bytes(image) + b'more')
+    for use_mmap in (True, False):
+        with pytest.raises(ValueError, match='unsupported tree image version 2'):
+            CompactTernarySearchTree.load(path, mmap=use_mmap)
+
+
+# _____________ Batched Search Testing _____________
+
+@pytest.fixture
+def batch(unique_inserted_words, not_inserted_words):
+    keys = sorted(unique_inserted_words) + not_inserted_words + ['', 'c', 'co', 'cx', 'combinationsx']
+    return keys[::-1] + keys[:5]
+
+@pytest.mark.parametrize("exact", [True, False])
+def test_search_many_matches_search(tst, batch, exact):
+    assert tst.search_many(batch, exact=exact) == [tst.search(key, exact=exact) for key in batch]
+
+def test_contains_many_matches_exact_search(tst, batch):
+    tst.insert('')
+    assert tst.contains_many(iter(batch)) == [tst.search(key, exact=True) for key in batch]
+    assert TernarySearchTree().contains_many(batch) == [False] * len(batch)
+
+def test_search_many_as_array(tst, batch):
+    numpy = pytest.importorskip('numpy')
+    result = tst.search_many(batch, as_array=True)
+    assert result.dtype == numpy.bool_
+    assert result.tolist() == tst.search_many(batch)
+
+
+# _____________ Query Cache Testing _____________
+
+@pytest.fixture
+def cached_tst(inserted_words):
+    tree = TernarySearchTree(cache_size=4)
+    for word in inserted_words:
+        tree.insert(word)
+    return tree
+
+def test_cache_counts_hits_and_misses(cached_tst):
+    assert cached_tst.completions('comb') == cached_tst.completions('comb')
+    assert cached_tst.search('co') and cached_tst.search('co')
+    info = cached_tst.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (2, 2, 2)
+    assert TernarySearchTree().cache_info() is None
+
+def test_cache_evicts_least_recently_used(cached_tst):
+    for prefix in ['a', 'b', 'c', 'd', 'a', 'e']:
+        cached_tst.completions(prefix)
+    info = cached_tst.cache_info()
+    assert (info.hits, info.evictions, info.currsize) == (1, 1, 4)
+    cached_tst.completions('a')
+    assert cached_tst.cache_info().hits == 2, "'a' should have survived as recently used"
+    cached_tst.completions('b')
+    assert cached_tst.cache_info().misses == 6, "'b' should have been evicted"
+
+def test_insert_invalidates_only_affected_prefixes(cached_tst):
+    before = cached_tst.completions('comb', limit=None)
+    assert not cached_tst.search('combo', exact=True)
+    cached_tst.completions('x')
+    cached_tst.insert('combo')
+    assert cached_tst.cache_info().currsize == 1, "only the 'x' entry should remain"
+    assert sorted(cached_tst.completions('comb')) == sorted(before + ['combo'])
+    assert cached_tst.search('combo', exact=True)
+
+
+# _____________ Fuzzy Search Testing _____________
+
+def levenshtein(a, b):
+    above = list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        row = [i]
+        for j in range(1, len(b) + 1):
+            row.append(min(row[j - 1] + 1, above[j] + 1, above[j - 1] + (b[j - 1] != char)))
+        above = row
+    return above[-1]
+
+@pytest.mark.parametrize("word", ['combination', 'combinatoin', 'cobmine', 'x', ''])
+@pytest.mark.parametrize("max_distance", [0, 1, 2])
+def test_fuzzy_search_matches_brute_force(tst, unique_inserted_words, word, max_distance):
+    tst.insert('')
+    expected = sorted(((other, levenshtein(word, other)) for other in unique_inserted_words | {''}
+                       if levenshtein(word, other) <= max_distance),
+                      key=lambda match: (match[1], match[0]))
+    assert tst.fuzzy_search(word, max_distance) == expected
+
+def test_fuzzy_search_limit_keeps_closest(tst):
+    matches = tst.fuzzy_search('combinatio', max_distance=2)
+    assert tst.fuzzy_search('combinatio', max_distance=2, limit=1) == matches[:1]
+    assert matches[0] == ('combination', 1)
+
+
+# _____________ Wildcard Matching Testing _____________
+
+@pytest.mark.parametrize("pattern", ['combination?', 'c?mb*', '*s', '*', '?', '', 'c*b*n*', '**on**', 'x*'])
+def test_match_agrees_with_regular_expression(tst, unique_inserted_words, pattern):
+    import re
+    regex = re.compile(''.join('.' if c == '?' else '.*' if c == '*' else re.escape(c) for c in pattern))
+    expected = sorted(word for word in unique_inserted_words if regex.fullmatch(word))
+    found = list(tst.match(pattern))
+    assert sorted(found) == expected, f'wrong matches for {pattern}'
+    assert len(found) == len(set(found)), f'duplicate matches for {pattern}'
+
+def test_match_empty_string():
+    tree = TernarySearchTree()
+    for word in ['', 'a', 'ab']:
+        tree.insert(word)
+    assert list(tree.match('')) == ['']
+    assert sorted(tree.match('*')) == ['', 'a', 'ab']
+    assert list(tree.match('?')) == ['a']
+
+
+# _____________ Removal Testing _____________
+
+def count_nodes(tree):
+    nodes, stack = 0, [tree._root] if tree._root is not None else []
+    while stack:
+        node = stack.pop()
+        nodes += 1
+        stack.extend(child for child in (node._lt, node._eq, node._gt) if child is not None)
+    return nodes
+
+@pytest.mark.parametrize("balanced", [False, True])
+def test_remove_all_words_empties_tree(inserted_words, unique_inserted_words, balanced):
+    tree = TernarySearchTree(balanced=balanced)
+    # "" first makes the root a "*" sentinel, which rotations move away
+    for word in [''] + inserted_words:
+        tree.insert(word)
+    remaining = set(unique_inserted_words) | {''}
+    for word in sorted(remaining, key=lambda word: word[::-1]):
+        tree.remove(word)
+        remaining.discard(word)
+        assert not tree.search(word, exact=True), f'{word} still found'
+        assert sorted(tree.all_strings()) == sorted(remaining)
+        assert len(tree) == len(remaining)
+        for other in remaining:
+            assert tree.search(other, exact=True), f'{other} lost when removing {word}'
+    assert tree._root is None, 'nodes left after removing all words'
+    assert not tree.search('') and tree.search_many(['']) == [False]
+
+def test_remove_prunes_nodes(tst):
+    nodes = count_nodes(tst)
+    for word in ['', 'zebra', 'combinatorics', 'comb']:
+        tst.insert(word)
+    for word in ['zebra', 'combinatorics', 'comb', '']:
+        tst.remove(word)
+    assert count_nodes(tst) == nodes, 'unused nodes were not unlinked'
+
+def test_remove_keeps_prefixes_and_extensions():
+    tree = TernarySearchTree()
+    for word in ['', 'ca', 'cat', 'cats']:
+        tree.insert(word)
+    tree.remove('cat')
+    assert tree.search('cats', exact=True) and tree.search('ca', exact=True)
+    assert tree.count_prefix('cat') == 1
+    tree.remove('')
+    assert not tree.search('', exact=True) and tree.search('')
+    assert len(tree) == 2
+
+def test_remove_missing_word_raises_discard_does_not(tst):
+    with pytest.raises(KeyError):
+        tst.remove('combinat')
+    with pytest.raises(KeyError):
+        tst.remove('')
+    with pytest.raises(KeyError):
+        TernarySearchTree().remove('a')
+    length = len(tst)
+    tst.discard('combinat')
+    assert len(tst) == length
+
+
+# _____________ Weighted Top-k Testing _____________
+
+@pytest.fixture
+def weights(unique_inserted_words):
+    return {word: (len(word) * 37) % 11 for word in unique_inserted_words}
+
+@pytest.fixture
+def weighted_tst(weights):
+    tree = TernarySearchTree()
+    for word, weight in weights.items():
+        tree.insert(word, weight)
+    return tree
+
+@pytest.mark.parametrize("prefix", ['', 'c', 'comb', 'combinations', 'x'])
+def test_top_k_returns_heaviest_completions(weighted_tst, weights, prefix):
+    expected = sorted((weight for word, weight in weights.items() if word.startswith(prefix)), reverse=True)
+    found = weighted_tst.top_k(prefix, 3)
+    assert [weight for _, weight in found] == expected[:3]
+    for word, weight in found:
+        assert word.startswith(prefix) and weights[word] == weight
+
+def test_plain_nodes_do_not_store_weights_or_heights(tst, weighted_tst):
+    optional = {'_weight', '_max_weight', '_height'}
+    stack = [tst._root]
+    while stack:
+        node = stack.pop()
+        assert not optional & node.__dict__.keys(), f'{node!r} stores {node.__dict__.keys() & optional}'
+        stack.extend(child for child in (node._lt, node._eq, node._gt) if child is not None)
+    assert weighted_tst.top_k('', 1) and weighted_tst._root._max_weight > 0
+
+def test_top_k_follows_weight_updates_and_removal(weighted_tst, weights):
+    lightest = min(weights, key=weights.get)
+    weighted_tst.insert(lightest, 100)
+    assert weighted_tst.top_k('', 1) == [(lightest, 100)]
+    weighted_tst.insert(lightest)
+    assert weighted_tst.top_k('', 1) == [(lightest, 100)], 'insert without weight changed the weight'
+    weighted_tst.remove(lightest)
+    assert weighted_tst.top_k('', 1)[0][1] == max(weights.values())
+    weighted_tst.insert('', 1000)
+    assert weighted_tst.top_k('', 1) == [('', 1000)]
+    assert weighted_tst.top_k('', 0) == []
+
+
+# _____________ Sharding Testing _____________
+
+@pytest.fixture
+def sharded_tst(unique_inserted_words):
+    with ShardedTernarySearchTree(sorted(unique_inserted_words) + [''], workers=3) as tree:
+        yield tree
+
+def test_sharded_answers_match_single_tree(sharded_tst, tst, inserted_words, not_inserted_words):
+    tst.insert('')
+    keys = inserted_words + not_inserted_words + ['', 'comb', 'c', 'zz']
+    assert len(sharded_tst) == len(tst)
+    assert len(sharded_tst._bounds) == 2
+    assert sharded_tst.contains_many(keys) == tst.contains_many(keys)
+    assert sharded_tst.search_many(keys) == [tst.search(key) for key in keys]
+    for prefix in ['', 'c', 'comb', 'x']:
+        assert sharded_tst.count_prefix(prefix) == tst.count_prefix(prefix)
+        assert sorted(sharded_tst.completions(prefix)) == sorted(tst.iter_prefix(prefix))
+
+def test_sharded_insert_and_top_k(sharded_tst):
+    length = len(sharded_tst)
+    sharded_tst.insert('zygote', 50)
+    sharded_tst.insert('aardvark', 40)
+    sharded_tst.insert('zygote')
+    assert len(sharded_tst) == length + 2
+    assert sharded_tst.search('zygote', exact=True)
+    assert sharded_tst.top_k('', 2) == [('zygote', 50), ('aardvark', 40)]
+    assert sharded_tst.top_k('zy', 1) == [('zygote', 50)]
+
+def test_sharded_worker_errors_are_raised(sharded_tst):
+    with pytest.raises(TypeError):
+        sharded_tst.insert('zebra', 'heavy')
+    assert sharded_tst.search('zz') is False
+
+def test_sharded_broadcast_error_leaves_no_stale_replies(sharded_tst, tst, unique_inserted_words):
+    # every shard fails on a negative limit; all replies must still be read
+    with pytest.raises(ValueError):
+        sharded_tst.completions('', limit=-1)
+    for prefix in ['comb', 'z', 'c']:
+        assert sharded_tst.search(prefix) == tst.search(prefix)
+        assert sharded_tst.count_prefix(prefix) == tst.count_prefix(prefix)
+        assert sorted(sharded_tst.completions(prefix)) == sorted(tst.iter_prefix(prefix))
+    assert sorted(sharded_tst.completions('')) == sorted(unique_inserted_words | {''})
+
+
+# _____________ Snapshot Testing _____________
+
+@pytest.mark.parametrize("balanced", [False, True])
+def test_snapshot_is_unchanged_by_later_writes(unique_inserted_words, balanced):
+    tree = TernarySearchTree.from_iterable(unique_inserted_words, balanced=balanced, persistent=True)
+    before = tree.snapshot()
+    words = sorted(before.all_strings())
+    for word in ['zebra', 'combinatorics', 'comb', 'a', '']:
+        tree.insert(word, 5)
+    for word in sorted(unique_inserted_words)[::2]:
+        tree.discard(word)
+    tree.rebalance()
+    assert sorted(before.all_strings()) == words and len(before) == len(words)
+    assert before.count_prefix('comb') == sum(word.startswith('comb') for word in words)
+    after = tree.snapshot()
+    assert after._root is tree._root
+    assert sorted(after.all_strings()) == sorted(tree.all_strings())
+    assert after.top_k('z', 1) == [('zebra', 5)]
+
+def test_snapshot_is_read_only(tst):
+    view = tst.snapshot()
+    tst.insert('zebra')
+    assert not view.search('zebra') and len(view) == len(tst) - 1
+    for write in (lambda: view.insert('x'), lambda: view.remove('a'), view.rebalance):
+        with pytest.raises(TypeError):
+            write()
+
+
+# _____________ Server Testing _____________
+
+def test_server_coalesces_and_batches_queries(tst, inserted_words, not_inserted_words):
+    async def run():
+        server = TreeServer(tst, batch_delay=0.01)
+        keys = (inserted_words + not_inserted_words) * 2
+        found = await asyncio.gather(*(server.query(('search', key, True)) for key in keys),
+                                     server.query(('complete', 'comb', 2)),
+                                     server.query(('top_k', 'comb', 2)))
+        return server, found
+    server, found = asyncio.run(run())
+    keys = inserted_words + not_inserted_words
+    assert found[:-2] == [tst.search(key, exact=True) for key in keys * 2]
+    assert found[-2] == list(tst.iter_prefix('comb', 2)) and found[-1] == tst.top_k('comb', 2)
+    assert server.counters['batches'] == 1
+    assert server.counters['coalesced'] == 2 * len(keys) - len(set(keys))
+
+@pytest.mark.parametrize("distinct", [True, False])
+def test_server_bounds_pending_requests_beyond_batch_size(tst, distinct):
+    async def run():
+        server = TreeServer(tst, max_pending=8, batch_size=4)
+        keys = [f'word{i}' if distinct else 'comb' for i in range(20)]
+        return server, await asyncio.gather(*(server.query(('search', key, False)) for key in keys),
+                                            return_exceptions=True)
+    server, answers = asyncio.run(run())
+    refused = [isinstance(answer, OverflowError) for answer in answers]
+    # the last query of a full batch is answered before it waits
+    assert refused == sorted(refused) and 8 <= refused.index(True) < 12
+    assert server.counters['rejected'] == refused.count(True) and server._pending == 0
+
+def test_server_answers_http_and_refuses_when_overloaded(tst):
+    async def get(port, target):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(f'GET {target} HTTP/1.1\r\nConnection: close\r\n\r\n'.encode())
+        status = int((await reader.readline()).split()[1])
+        body = (await reader.read()).split(b'\r\n\r\n', 1)[1]
+        writer.close()
+        return status, json.loads(body)
+
+    async def run():
+        server = TreeServer(tst, max_pending=1, batch_delay=0.01)
+        port = await server.start(port=0)
+        answers = await asyncio.gather(get(port, '/search?q=comb'), get(port, '/search?q=zz'))
+        answers += [await get(port, '/complete?prefix=comb&limit=1'),
+                    await get(port, '/top_k?prefix=x'), await get(port, '/nothing'),
+                    await get(port, '/complete?prefix=a&limit=no')]
+        await server.close()
+        return answers
+    ok, refused, complete, top_k, missing, bad = asyncio.run(run())
+    assert ok == (200, {'found': True})
+    assert refused[0] == 503
+    assert complete == (200, {'completions': list(tst.iter_prefix('comb', 1))})
+    assert top_k == (200, {'results': []})
+    assert missing[0] == 404 and bad[0] == 400
+
+
+# _____________ Benchmark Suite Testing _____________
+
+def test_suite_measures_every_scenario(inserted_words):
+    for name in suite.SCENARIOS:
+        result = suite.measure(name, inserted_words * 3, runs=2, warmup=0)
+        assert result['median_ns'] > 0 and result['peak_bytes'] >= result['retained_bytes'] >= 0
+
+def test_suite_compare_flags_regressions_beyond_threshold_and_noise():
+    def report(median, iqr, peak):
+        return {'scenarios': {'build': {'median_ns': median, 'iqr_ns': iqr, 'peak_bytes': peak}}}
+    assert suite.compare(report(100, 5, 10), report(108, 5, 10), 0.1) == []
+    assert suite.compare(report(100, 5, 10), report(120, 30, 10), 0.1) == []
+    assert [regression[:2] for regression in suite.compare(report(100, 5, 10), report(120, 5, 12), 0.1)] \
+        == [('build', 'median_ns'), ('build', 'peak_bytes')]
+
+
+# _____________ Statistics Testing _____________
+
+def test_stats_describe_tree_shape():
+    tree = TernarySearchTree()
+    for word in ['b', 'a', 'c', 'cat', '']:
+        tree.insert(word)
+    stats = tree.stats()
+    assert (stats.nodes, stats.keys, stats.max_depth) == (5, 5, 4)
+    assert stats.depth_histogram == {1: 1, 2: 2, 4: 1}
+    assert stats.mean_depth == 9 / 4
+    assert stats.chain_lengths == {1: 2, 2: 1}
+    assert stats.nbytes > 0
+    assert TernarySearchTree().stats().nodes == 0
+
+def test_stats_show_degenerate_sorted_insertion(sorted_words):
+    degenerate = TernarySearchTree()
+    for word in sorted_words:
+        degenerate.insert(word)
+    balanced = TernarySearchTree.from_sorted(sorted_words)
+    assert degenerate.stats().nodes == balanced.stats().nodes
+    assert max(degenerate.stats().chain_lengths) > max(balanced.stats().chain_lengths)
+    assert degenerate.stats().mean_depth > balanced.stats().mean_depth
+
+def test_instrument_counts_visits_and_comparisons():
+    tree = TernarySearchTree()
+    for word in ['b', 'a', 'c']:
+        tree.insert(word)
+    assert tree.op_counts() is None
+    tree.instrument()
+    tree.search('c', exact=True)
+    tree.search('a')
+    tree.search('d')
+    tree.insert('ab')
+    assert tree.op_counts() == {'search': (3, 6, 11, 2), 'insert': (1, 3, 5, 3)}
+    tree.instrument(False)
+    tree.search('c')
+    assert tree.op_counts() is None
+
+def test_instrument_counts_one_walk_per_map_assignment():
+    plain, mapping = TernarySearchTree(), TSTMap()
+    for word in ['b', 'a', 'c']:
+        plain.insert(word)
+        mapping[word] = word
+    plain.instrument()
+    mapping.instrument()
+    plain.insert('ab')
+    mapping['ab'] = 1
+    assert mapping.op_counts() == plain.op_counts() == {'insert': (1, 3, 5, 3)}
+    plain.insert('ab')
+    mapping['ab'] = 2
+    assert mapping.op_counts() == plain.op_counts() == {'insert': (2, 6, 10, 3)}
+
+def test_instrument_counts_the_walk_before_rotations():
+    tree = TernarySearchTree(balanced=True)
+    tree.insert('a')
+    tree.insert('b')
+    tree.instrument()
+    # 'c' walks a, b and its new node; the rotation then lifts b to the root
+    tree.insert('c')
+    assert tree._root._char == 'b'
+    assert tree.op_counts() == {'insert': (1, 3, 6, 3)}
+
+
+# _____________ Path Compression Testing _____________
+
+@pytest.fixture
+def compressed_tst(inserted_words):
+    tree = CompressedTernarySearchTree()
+    for word in inserted_words:
+        tree.insert(word)
+    return tree
+
+def test_compressed_matches_tst(compressed_tst, tst, inserted_words, not_inserted_words):
+    assert len(compressed_tst) == len(tst)
+    assert sorted(compressed_tst.all_strings()) == sorted(tst.all_strings())
+    for word in inserted_words + not_inserted_words + ['', 'c', 'comb', 'combinatio']:
+        assert compressed_tst.search(word) == tst.search(word)
+        assert compressed_tst.search(word, exact=True) == tst.search(word, exact=True)
+        assert sorted(compressed_tst.iter_prefix(word)) == sorted(tst.iter_prefix(word))
+
+@pytest.mark.parametrize("limit", [0, 1, 2])
+def test_compressed_iter_prefix_limit_matches_tst(compressed_tst, tst, limit):
+    for tree in (compressed_tst, tst):
+        tree.insert('')
+    for prefix in ['', 'comb']:
+        assert list(compressed_tst.iter_prefix(prefix, limit)) == list(tst.iter_prefix(prefix, limit))
+        assert len(list(compressed_tst.iter_prefix(prefix, limit))) == limit
+
+def test_compressed_splits_segments_lazily():
+    tree = CompressedTernarySearchTree()
+    tree.insert('combination')
+    assert tree.node_count() == 1
+    tree.insert('comb')
+    tree.insert('combat')
+    assert tree.node_count() == 3
+    assert not tree.search('com', exact=True) and tree.search('com')
+    assert tree.search('comb', exact=True) and not tree.search('combi', exact=True)
+    assert sorted(tree.iter_prefix('combi')) == ['combination']
+    assert list(tree.iter_prefix('co', limit=1)) == ['comb']
+
+def test_compressed_uses_fewer_nodes(compressed_tst, tst):
+    assert compressed_tst.node_count() < count_nodes(tst) / 2
+
+
+# _____________ File Ingestion Testing _____________
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+def test_insert_from_file_matches_stripped_lines(tmp_path, inserted_words, chunk_size):
+    path = tmp_path / 'words.txt'
+    path.write_text('\n'.join(inserted_words) + '\r\n  comb  \n\nzebra\twith tab\nlast')
+    with open(path) as file:
+        expected = [line.strip() for line in file]
+    tree = TernarySearchTree()
+    report = tree.insert_from_file(path, chunk_size=chunk_size)
+    assert sorted(tree.all_strings()) == sorted(set(expected))
+    assert report.lines == len(expected) and report.keys == len(set(expected))
+    assert report.seconds >= 0 and report.keys_per_second >= 0
+
+def test_insert_from_file_counts_only_new_keys(tmp_path, tst, inserted_words):
+    path = tmp_path / 'words.txt'
+    path.write_text('\n'.join(inserted_words + ['zebra']) + '\n', encoding='latin-1')
+    for keys in (1, 0):
+        report = tst.insert_from_file(path, encoding='latin-1')
+        assert report.lines == len(inserted_words) + 1
+        assert report.keys == keys
+
+
+# _____________ Prefixes Of Testing _____________
+
+def test_prefixes_of_finds_stored_prefixes_in_one_pass(tst, inserted_words, not_inserted_words):
+    for text in inserted_words + not_inserted_words + ['combinationsxyz', 'x', '']:
+        expected = [text[:i] for i in range(1, len(text) + 1) if tst.search(text[:i], exact=True)]
+        assert tst.prefixes_of(text) == expected
+        assert tst.longest_prefix_of(text) == (expected[-1] if expected else None)
+
+def test_prefix_matching_from_start_offset():
+    tree = TernarySearchTree()
+    for word in ['a', 'an', 'ant', 'the']:
+        tree.insert(word)
+    text = 'theantelope'
+    assert tree.longest_prefix_of(text) == 'the'
+    assert tree.prefixes_of(text, 3) == ['a', 'an', 'ant']
+    assert tree.longest_prefix_of(text, 6) is None and tree.prefixes_of(text, 11) == []
+    tree.insert('')
+    assert tree.prefixes_of(text, 6) == [''] and tree.longest_prefix_of(text, 3) == 'ant'
+    assert TernarySearchTree().longest_prefix_of(text) is None
+
+
+# _____________ Sorted Iteration Testing _____________
+
+def test_iter_yields_sorted_strings(tst, unique_inserted_words):
+    tst.insert('')
+    assert list(tst) == sorted(unique_inserted_words | {''})
+    assert 'comb' not in tst and 'combine' in tst
+    assert list(TernarySearchTree()) == []
+
+@pytest.mark.parametrize("lo, hi", [(None, None), ('comb', 'combo'), ('combined', None),
+                                    (None, 'combine'), ('', 'b'), ('a', 'a'), ('zz', None),
+                                    ('combinations', 'combinations~')])
+def test_range_matches_filtered_sort(tst, unique_inserted_words, lo, hi):
+    tst.insert('')
+    words = sorted(unique_inserted_words | {''})
+    expected = [word for word in words if (lo is None or word >= lo) and (hi is None or word < hi)]
+    assert list(tst.range(lo, hi)) == expected
+
+def test_keys_from_pages_through_the_tree(tst, unique_inserted_words):
+    words, pages, start = sorted(unique_inserted_words), [], ''
+    while True:
+        page = tst.keys_from(start, 3)
+        if not page:
+            break
+        pages += page
+        start = page[-1] + '\0'
+    assert pages == words
+    assert tst.keys_from('combine', 2) == [word for word in words if word >= 'combine'][:2]
+
+
+# _____________ Set Algebra Testing _____________
+
+@pytest.fixture
+def other_tst(not_inserted_words, inserted_words):
+    tree = TernarySearchTree(balanced=True)
+    for word in not_inserted_words + inserted_words[::3] + ['']:
+        tree.insert(word, 7)
+    return tree
+
+def test_union_intersection_difference_match_sets(tst, other_tst):
+    mine, theirs = set(tst.all_strings()), set(other_tst.all_strings())
+    for result, expected in ((tst.union(other_tst), mine | theirs),
+                             (tst.intersection(other_tst), mine & theirs),
+                             (tst.difference(other_tst), mine - theirs),
+                             (other_tst.difference(tst), theirs - mine)):
+        assert list(result) == sorted(expected) and len(result) == len(expected)
+        assert result.count_prefix('') == len(expected)
+    assert tst.intersection(TernarySearchTree()).all_strings() == []
+
+def test_merged_trees_are_balanced_and_keep_weights(tst, other_tst):
+    union = tst.union(other_tst)
+    assert max(union.stats().chain_lengths) <= max(TernarySearchTree.from_iterable(union).stats().chain_lengths)
+    assert other_tst.intersection(tst).top_k('', 1)[0][1] == 7
+    assert set(weight for _, weight in union.top_k('', len(union))) == {0, 7}
+    assert count_nodes(tst.intersection(other_tst)) < count_nodes(tst)
+
+def test_issubset(tst, other_tst):
+    assert tst.intersection(other_tst).issubset(tst)
+    assert tst.issubset(tst.union(other_tst)) and other_tst.issubset(tst.union(other_tst))
+    assert not tst.issubset(other_tst) and not other_tst.issubset(tst)
+    assert TernarySearchTree().issubset(tst)
+    empty = TernarySearchTree()
+    empty.insert('')
+    assert not empty.issubset(tst) and empty.issubset(other_tst)
+
+
+# _____________ Frozen DAWG Testing _____________
+
+def test_freeze_keeps_queries_and_shares_suffixes(tst, inserted_words, not_inserted_words):
+    tst.insert('')
+    frozen = tst.freeze()
+    assert len(frozen) == len(tst) and list(frozen) == list(tst)
+    for word in inserted_words + not_inserted_words + ['', 'comb', 'c']:
+        assert frozen.search(word) == tst.search(word)
+        assert frozen.search(word, exact=True) == tst.search(word, exact=True)
+        assert list(frozen.iter_prefix(word)) == list(tst.range(word, word + '\U0010ffff'))
+    assert len(frozen._store) < len(CompactTernarySearchTree.from_tree(tst)._store)
+    with pytest.raises(TypeError):
+        frozen.insert('zebra')
+
+def test_frozen_image_loads_read_only(tst, tmp_path):
+    path = tmp_path / 'frozen.tst'
+    tst.freeze().save(path)
+    loaded = CompactTernarySearchTree.load(path, mmap=False)
+    assert list(loaded) == list(tst)
+    with pytest.raises(TypeError):
+        loaded.insert('zebra')
+    assert list(TernarySearchTree().freeze()) == []
+
+def test_compact_iter_prefix_is_sorted(compact_tst, unique_inserted_words):
+    assert list(compact_tst) == sorted(unique_inserted_words)
+    assert list(compact_tst.iter_prefix('comb', limit=2)) == sorted(
+        word for word in unique_inserted_words if word.startswith('comb'))[:2]
+
+
+# _____________ Map Testing _____________
+
+@pytest.fixture
+def tst_map(unique_inserted_words):
+    mapping = TSTMap()
+    for word in sorted(unique_inserted_words):
+        mapping[word] = len(word)
+    return mapping
+
+def test_map_get_set_and_setdefault(tst_map, unique_inserted_words):
+    for word in unique_inserted_words:
+        assert tst_map[word] == tst_map.get(word) == len(word)
+    with pytest.raises(KeyError):
+        tst_map['comb']
+    assert tst_map.get('comb', -1) == -1
+    tst_map['combine'] = 'replaced'
+    assert tst_map['combine'] == 'replaced' and len(tst_map) == len(unique_inserted_words)
+    assert tst_map.setdefault('comb', []) == [] and tst_map['comb'] == []
+    assert tst_map.setdefault('comb', 'other') == []
+    tst_map[''] = 'empty'
+    assert tst_map[''] == 'empty' and tst_map.setdefault('', None) == 'empty'
+    tst_map.insert('zebra')
+    assert tst_map['zebra'] is None
+
+def test_map_setdefault_walks_once():
+    mapping = TSTMap()
+    for word in ['b', 'a', 'c']:
+        mapping[word] = word
+    mapping.instrument()
+    assert mapping.setdefault('ab', 1) == 1 and mapping.setdefault('ab', 2) == 1
+    # one walk per call, the same as insert('ab') (3 nodes, 5 comparisons)
+    assert mapping.op_counts() == {'insert': (2, 6, 10, 3)}
+
+def test_map_items_by_prefix(tst_map, unique_inserted_words):
+    tst_map[''] = 0
+    assert list(tst_map.items()) == [('', 0)] + [(word, len(word)) for word in sorted(unique_inserted_words)]
+    assert list(tst_map.items('comb')) == [(word, len(word)) for word in sorted(unique_inserted_words)
+                                           if word.startswith('comb')]
+    assert list(tst_map.items('zz')) == [] and list(TSTMap().items()) == []
+
+@pytest.mark.parametrize("balanced, persistent", [(False, False), (True, False), (True, True)])
+def test_map_values_follow_removal_and_snapshots(unique_inserted_words, balanced, persistent):
+    mapping = TSTMap(balanced=balanced, persistent=persistent)
+    for word in sorted(unique_inserted_words):
+        mapping[word] = word.upper()
+    view = mapping.snapshot()
+    for word in sorted(unique_inserted_words)[::2]:
+        del mapping[word]
+        mapping.insert(word)
+        assert mapping[word] is None
+    assert all(view[word] == word.upper() for word in unique_inserted_words)
+    with pytest.raises(KeyError):
+        del mapping['comb']
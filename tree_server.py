@@ -0,0 +1,238 @@
+"""A class, TreeServer, that answers search, completion and top-k queries
+over a Ternary Search Tree as a small asyncio HTTP/JSON service
+
+Run from the repository root with, e.g.:
+    python tree_server.py data/search_trees/corncob_lowercase.txt --port 8080
+and query it with:
+    curl 'localhost:8080/complete?prefix=comb&limit=5'
+"""
+
+import argparse
+import asyncio
+import json
+from collections import Counter
+from urllib.parse import parse_qs, urlsplit
+
+from ternary_search_tree import TernarySearchTree
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+            503: 'Service Unavailable'}
+
+
+class TreeServer:
+    """An asyncio HTTP server for a TernarySearchTree
+
+    Identical queries that arrive while one of them is waiting are answered
+    once (coalescing), waiting queries are answered together every
+    batch_delay seconds or as soon as batch_size distinct queries are
+    waiting, with all exact and all prefix lookups of a batch going through
+    one search_many pass (micro-batching), and once max_pending requests,
+    coalesced ones included, are waiting for their answers new ones are
+    refused with status 503 (backpressure).
+        Endpoints (GET, JSON responses)
+    ----------
+    /search?q=<str>&exact=<0|1>      : {"found": bool}
+    /complete?prefix=<str>&limit=<n> : {"completions": [str, ...]}
+    /top_k?prefix=<str>&k=<n>        : {"results": [[str, weight], ...]}
+    /stats                           : counters of the server
+        Methods
+    ----------
+    start         : start listening on host and port
+    serve_forever : serve until cancelled
+    close         : stop listening and wait for the server to shut down
+    query         : answer one query, coalesced and batched with the others
+    """
+
+    def __init__(self, tree: TernarySearchTree, max_pending=1024, batch_size=256,
+                 batch_delay=0.0):
+        self._tree = tree
+        self._max_pending = max_pending
+        self._batch_size = batch_size
+        self._batch_delay = batch_delay
+        self._waiting = {}  # query -> future shared by all its requests
+        self._pending = 0  # requests waiting for their answers
+        self._flush_handle = None
+        self._server = None
+        # requests, coalesced, batches, rejected
+        self.counters = Counter()
+
+    async def start(self, host='127.0.0.1', port=8080):
+        """ start listening; port 0 picks a free port
+        Parameters
+        ----------
+        host : str
+        port : int
+
+        Returns
+        ----------
+        int, the port the server listens on
+        """
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def query(self, query):
+        """ answer a query, one of ('search', key, exact),
+        ('complete', prefix, limit) and ('top_k', prefix, k)
+        Parameters
+        ----------
+        query : tuple
+
+        Returns
+        ----------
+        Boolean, List of str or List of (str, weight) pairs
+        """
+        self.counters['requests'] += 1
+        # count requests rather than waiting queries: a full batch is
+        # answered at once, but its requests wait until they are resumed
+        if self._pending >= self._max_pending:
+            self.counters['rejected'] += 1
+            raise OverflowError('too many pending requests')
+        self._pending += 1
+        try:
+            future = self._waiting.get(query)
+            if future is not None:
+                self.counters['coalesced'] += 1
+                return await asyncio.shield(future)
+
+            future = asyncio.get_running_loop().create_future()
+            self._waiting[query] = future
+            if len(self._waiting) >= self._batch_size:
+                self._flush()
+            elif self._flush_handle is None:
+                # with no delay the batch holds the queries read in one pass of
+                # the event loop, which costs a single client no latency
+                self._flush_handle = asyncio.get_running_loop().call_later(
+                    self._batch_delay, self._flush)
+            return await asyncio.shield(future)
+        finally:
+            self._pending -= 1
+
+    def _flush(self):
+        """ answer all waiting queries """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        waiting, self._waiting = self._waiting, {}
+        self.counters['batches'] += 1
+        tree = self._tree
+
+        # one search_many pass per search mode
+        for exact in (False, True):
+            queries = [query for query in waiting
+                       if query[0] == 'search' and query[2] == exact]
+            if queries:
+                found = tree.search_many([query[1] for query in queries], exact)
+                for query, result in zip(queries, found):
+                    waiting[query].set_result(result)
+
+        for query, future in waiting.items():
+            if future.done():
+                continue
+            kind, prefix, n = query
+            try:
+                if kind == 'complete':
+                    future.set_result(list(tree.iter_prefix(prefix, n)))
+                else:
+                    future.set_result(tree.top_k(prefix, n))
+            except Exception as error:
+                future.set_exception(error)
+
+    def _parse(self, target):
+        """ turn a request target into (status, query or None) """
+        url = urlsplit(target)
+        params = {key: values[0] for key, values in
+                  parse_qs(url.query, keep_blank_values=True).items()}
+        try:
+            if url.path == '/search':
+                return 200, ('search', params['q'], params.get('exact', '0') == '1')
+            if url.path == '/complete':
+                limit = params.get('limit')
+                return 200, ('complete', params['prefix'], None if limit is None else int(limit))
+            if url.path == '/top_k':
+                return 200, ('top_k', params['prefix'], int(params.get('k', 10)))
+            if url.path == '/stats':
+                return 200, None
+        except (KeyError, ValueError):
+            return 400, None
+        return 404, None
+
+    async def _answer(self, target):
+        """ return (status, JSON body) for a request target """
+        status, query = self._parse(target)
+        if status != 200:
+            return status, {'error': _REASONS[status]}
+        if query is None:
+            return 200, dict(self.counters, pending=self._pending)
+        try:
+            result = await self.query(query)
+        except OverflowError as error:
+            return 503, {'error': str(error)}
+        except ValueError as error:
+            return 400, {'error': str(error)}
+        key = {'search': 'found', 'complete': 'completions', 'top_k': 'results'}[query[0]]
+        return 200, {key: result}
+
+    async def _handle(self, reader, writer):
+        """ serve the HTTP/1.1 requests of one connection, one at a time """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, target, version = line.decode('latin-1').split()
+                keep_alive = version == 'HTTP/1.1'
+                # skip the headers, only Connection is used
+                while True:
+                    header = await reader.readline()
+                    if header in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = header.decode('latin-1').partition(':')
+                    if name.strip().lower() == 'connection':
+                        keep_alive = value.strip().lower() == 'keep-alive'
+
+                if method != 'GET':
+                    status, body = 400, {'error': 'only GET is supported'}
+                else:
+                    status, body = await self._answer(target)
+                payload = json.dumps(body).encode()
+                writer.write(
+                    f'HTTP/1.1 {status} {_REASONS[status]}\r\n'
+                    f'Content-Type: application/json\r\n'
+                    f'Content-Length: {len(payload)}\r\n'
+                    f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode()
+                    + payload)
+                # wait while the client is slow to read its answers
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _main(args):
+    with open(args.words) as file:
+        tree = TernarySearchTree.from_iterable(line.strip() for line in file)
+    server = TreeServer(tree, args.max_pending, args.batch_size, args.batch_delay)
+    port = await server.start(args.host, args.port)
+    print(f'serving {len(tree)} strings on http://{args.host}:{port}')
+    await server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve a ternary search tree over HTTP')
+    parser.add_argument('words', help='file with one string per line')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--max-pending', type=int, default=1024)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--batch-delay', type=float, default=0.0)
+    asyncio.run(_main(parser.parse_args()))